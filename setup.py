@@ -22,6 +22,7 @@ setup(name='straph',
                 'straph.generators',
                 'straph.parser',
                 'straph.paths',
+                'straph.storage',
                 'straph.utils'
                 ],
       classifiers=[
@@ -31,4 +32,4 @@ setup(name='straph',
           "License :: OSI Approved :: Apache Software License",
           "Operating System :: OS Independent",
       ],
-      python_requires='>=3.6')
+      python_requires='>=3.8')
@@ -3,6 +3,7 @@ from straph.parser import parser, sort_csv
 from straph.paths import Path
 from straph.stream import (StreamGraph,
                            read_stream_graph,
+                           load_binary,
                            stream_graph_from_events_list,
                            read_stream_graph_from_json,
                            DFS_iterative)
@@ -17,6 +17,7 @@ import matplotlib.pyplot as plt
 import random
 from collections import defaultdict
 
+from straph import storage
 from straph.utils import get_cmap
 
 
@@ -43,6 +44,17 @@ class ConnectedComponent:
         self.active_links = active_links
         self.links = links
 
+    # Links are a property : reassigning them invalidates the cached time index.
+
+    @property
+    def links(self):
+        return self._links
+
+    @links.setter
+    def links(self, links):
+        self._links = links
+        self._time_index = None
+
     def __copy__(self):
         t = copy.copy(self.times)
         if self.links:
@@ -66,6 +78,7 @@ class ConnectedComponent:
         self.nodes.clear()
         self.links.clear()
         self.times.clear()
+        self._time_index = None
         self.active_links.clear()
 
     def size(self):
@@ -134,6 +147,7 @@ class ConnectedComponent:
         self.active_links.add((u, v))
         if self.links:
             self.links.append(list(link))
+            self._time_index = None
 
     def merge(self, comp):
         """
@@ -245,12 +259,25 @@ class ConnectedComponent:
         """
 
         a_l = defaultdict(set)
-        for t0, t1, u, v in self.links:
-            if t0 <= t <= t1:
-                a_l[u].add(u)
-                a_l[v].add(v)
+        if self.links:
+            for i in self.time_index().stab(t).tolist():
+                _, _, u, v = self.links[i]
+                a_l[u].add(v)
+                a_l[v].add(u)
         return a_l
 
+    def time_index(self):
+        """
+        Return an interval tree over the component's links (see ``straph.storage.IntervalTree``).
+        It is cached until the links are modified (through the component's methods or by reassigning them).
+        Inplace modifications of the list of links made outside of ``ConnectedComponent`` methods are not tracked.
+
+        :return: An ``IntervalTree``
+        """
+        if self._time_index is None:
+            self._time_index = storage.IntervalTree([l[0] for l in self.links], [l[1] for l in self.links])
+        return self._time_index
+
     def degrees(self):
         """
         Return the nodes degree in the aggregated graph induced by the component.
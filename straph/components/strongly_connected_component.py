@@ -15,11 +15,12 @@
 import copy
 
 from straph import dags as cdag
+from straph import storage
 from straph.components import ConnectedComponent
 
 
 def compute_strongly_connected_components(S, format="object_with_links", condensation_dag=False, isolated_nodes=True,
-                                          streaming_output=None, free_memory=False):
+                                          streaming_output=None, free_memory=False, E=None):
     """
     Compute Strongly Connected Components (SCC) of a ``StreamGraph``.
 
@@ -29,6 +30,8 @@ def compute_strongly_connected_components(S, format="object_with_links", condens
     :param S: A Stream Graph
     :param format: Format of the output can be "cluster" or "scc_object"
     :param condensation_dag: Boolean, true if we want to output the Condensation DAG, false otherwise
+    :param E: An iterable of ordered events (by default the batches of ``S.ordered_batch_links()``), nodes events \
+    are ignored. It can be a generator such as ``S.iter_events(nodes=False)``, batches are then built on the fly.
     :return:
     """
     node_2_status = {}  # Dictionary associating a node to his current status : (current degree, number current comp)
@@ -43,7 +46,10 @@ def compute_strongly_connected_components(S, format="object_with_links", condens
     #
     id_wcc = S.id
 
-    E = S.ordered_batch_links(free_memory=free_memory)
+    if E is None:
+        E = S.ordered_batch_links(free_memory=free_memory)
+    else:
+        E = storage.iter_batches(e for e in E if abs(e[0]) == 1)
 
     if streaming_output:
         opt = open(streaming_output, 'w')
@@ -121,7 +121,7 @@ def link_components(u, v, dict_components, rank):
             rank[v] += 1
 
 
-def compute_wcc_streaming(S, reformat=True, free_memory=False):
+def compute_wcc_streaming(S, reformat=True, free_memory=False, E=None):
     """
     Compute the Weakly Connected Components of a ``StreamGraph`` in a streaming fashion with the Union-Find algorithm.
 
@@ -130,12 +130,15 @@ def compute_wcc_streaming(S, reformat=True, free_memory=False):
     of its wcc). If True, output WCC as a list of clusters.
     :param free_memory: Optional parameter to free some memore. \
     WARNING: It does impact the original ``StreamGraph`` object
+    :param E: An iterable of ordered events (by default ``S.ordered_arrivals()``), departures are ignored. \
+    It can be a generator such as ``S.iter_events(departures=False)``.
     :return: Depends on the 'reformat' parameter. By default, a list of clusters.
     """
     node_to_wcc = {}
     rank = {}
     node_to_segmented_node = {}
-    E = S.ordered_arrivals(free_memory=free_memory)
+    if E is None:
+        E = S.ordered_arrivals(free_memory=free_memory)
     for e in E:
         c = e[0]
         if c == 2:
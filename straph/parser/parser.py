@@ -13,20 +13,30 @@
 # limitations under the License.
 
 import csv
+import datetime as dt
 import dateutil.parser as du
 import dpkt
+import heapq
+import io
+import itertools
 import json
 import math
+import numpy as np
 import os
+import pandas as pd
 import socket
+import struct
+import tempfile
 import time
+import warnings
 from collections import defaultdict
-from sortedcollections import SortedSet
+from joblib import Parallel, delayed
 from tqdm import tqdm
 
+from straph import storage
 from straph import stream as sg
+from straph.utils import infer_compression, open_file
 
-# TODO : parse PCAP (adpat pcap_to_csv and shit), see pcap_reader.
 # TODO : parse net, to finish (for Pajek datasets).
 
 __nb_2_protocol__ = {0: 'IPv6_HbH',  # IPv6 Hop by Hop
@@ -67,6 +77,322 @@ def datetime_to_timestamp(s):
     return du.parse(s).timestamp()
 
 
+def _parse_datetimes(values, time_format):
+    # Timestamps of datetimes matching time_format and a mask of valid rows, None if values can't be converted at once
+    try:
+        with warnings.catch_warnings():
+            # Format inference
+            warnings.simplefilter('ignore', UserWarning)
+            datetimes = pd.to_datetime(values, format=time_format, errors='coerce')
+    except (ValueError, TypeError):
+        # Several timezones
+        return None
+    if not pd.api.types.is_datetime64_any_dtype(datetimes.dtype):
+        return None
+    valid = datetimes.notna().to_numpy(copy=True)
+    if isinstance(datetimes.dtype, pd.DatetimeTZDtype):
+        us = datetimes.dt.tz_convert('UTC').dt.tz_localize(None).to_numpy(dtype='datetime64[us]').astype(np.int64)
+        # Same rounding as datetime.timestamp()
+        return us / 10 ** 6, valid
+    us = datetimes.to_numpy(dtype='datetime64[us]').astype(np.int64)
+    offsets, known = _local_offsets(us[valid] // 10 ** 6)
+    valid[valid] = known
+    seconds = us // 10 ** 6
+    seconds[valid] -= offsets[known]
+    return seconds + (us % 10 ** 6) / 1e6, valid
+
+
+def _local_offsets(seconds):
+    """
+    UTC offsets of local times, computed once per quarter of an hour (timezones change their offset on quarters).
+
+    :param seconds: Array of local times (seconds since 1970-01-01 00:00 local time)
+    :return: An array of offsets (seconds) and a mask of valid local times (not in a DST gap or an ambiguous period)
+    """
+    quarters, inverse = np.unique(seconds // 900, return_inverse=True)
+    offsets = np.zeros(len(quarters), dtype=np.int64)
+    known = np.zeros(len(quarters), dtype=bool)
+    epoch = dt.datetime(1970, 1, 1)
+    for i, q in enumerate(quarters.tolist()):
+        local = epoch + dt.timedelta(seconds=q * 900)
+        try:
+            t = local.timestamp()
+            known[i] = t == local.replace(fold=1).timestamp()
+        except (OverflowError, OSError, ValueError):
+            continue
+        offsets[i] = q * 900 - int(t)
+    inverse = inverse.reshape(-1)
+    return offsets[inverse], known[inverse]
+
+
+def datetimes_to_timestamps(values, time_format=None):
+    """
+    Vectorized version of ``datetime_to_timestamp``. Datetimes are converted at once with ``pandas.to_datetime``,
+    with the format *time_format* or, by default, with the format inferred from the first datetime then as ISO 8601.
+    Datetimes without timezone are in local time. Remaining rows (irregular formats, several timezones or ambiguous
+    local times) are parsed one by one with ``dateutil``.
+
+    :param values: A sequence of datetimes (strings)
+    :param time_format: A format (e.g. '%Y-%m-%d %H:%M:%S'), see ``datetime.strptime``
+    :return: An array (float64) of timestamps
+    """
+    values = pd.Series(values, dtype=object)
+    timestamps = np.zeros(len(values))
+    missing = np.ones(len(values), dtype=bool)
+    for f in ([time_format] if time_format else [None, 'ISO8601']):
+        if not missing.any():
+            break
+        rows = np.flatnonzero(missing)
+        converted = _parse_datetimes(values.iloc[rows], f)
+        if converted is not None:
+            t, valid = converted
+            timestamps[rows[valid]] = t[valid]
+            missing[rows[valid]] = False
+    if missing.any():
+        timestamps[missing] = [datetime_to_timestamp(x) for x in values[missing]]
+    return timestamps
+
+
+def _to_timestamps(values, time_is_datetime, time_format=None):
+    # Column of times (as strings) to an array of floats, commas are ignored ("1,000.5")
+    if time_is_datetime:
+        return datetimes_to_timestamps(values, time_format)
+    try:
+        # Exact conversion (as ``float``), unlike ``pd.to_numeric`` which may be off by one ulp
+        return values.to_numpy(dtype=np.float64)
+    except (ValueError, TypeError):
+        return values.str.replace(',', '', regex=False).to_numpy(dtype=np.float64)
+
+
+def _encode(values, table, keys):
+    """
+    Encode *values* with consecutive integers, unknown values are numbered in order of first appearance.
+
+    :param values: An array of hashable values
+    :param table: Dictionary value -> code (updated)
+    :param keys: List code -> value (updated)
+    :return: An array (int64) of codes
+    """
+    codes, uniques = pd.factorize(values)
+    mapping = np.empty(len(uniques), dtype=np.int64)
+    for i, x in enumerate(uniques.tolist()):
+        code = table.get(x)
+        if code is None:
+            code = table[x] = len(keys)
+            keys.append(x)
+        mapping[i] = code
+    return mapping[codes]
+
+
+def _encode_int(values, sorted_keys, sorted_codes):
+    """
+    Vectorized version of ``_encode`` for integers : known values are stored sorted, with their codes.
+
+    :param values: An array (int64)
+    :param sorted_keys: Sorted array of known values
+    :param sorted_codes: Codes of known values
+    :return: An array (int64) of codes and the updated (sorted_keys, sorted_codes)
+    """
+    codes, uniques = pd.factorize(values)
+    pos = np.searchsorted(sorted_keys, uniques)
+    known = pos < len(sorted_keys)
+    known[known] = sorted_keys[pos[known]] == uniques[known]
+    mapping = np.empty(len(uniques), dtype=np.int64)
+    mapping[known] = sorted_codes[pos[known]]
+    new = ~known
+    mapping[new] = len(sorted_keys) + np.arange(new.sum())
+    if new.any():
+        order = np.argsort(uniques[new])
+        at = pos[new][order]
+        sorted_keys = np.insert(sorted_keys, at, uniques[new][order])
+        sorted_codes = np.insert(sorted_codes, at, mapping[new][order])
+    return mapping[codes], sorted_keys, sorted_codes
+
+
+class _FileRange(io.RawIOBase):
+    """
+    Read-only file restricted to the bytes [start,end[ of *path*.
+    """
+
+    def __init__(self, path, start, end):
+        self._file = open(path, 'rb')
+        self._file.seek(start)
+        self._remaining = end - start
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        data = self._file.read(min(len(b), self._remaining))
+        self._remaining -= len(data)
+        b[:len(data)] = data
+        return len(data)
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+class _PartialGraph:
+    """
+    Links' intervals of a part of a dataset with its own numbering of nodes and links (in order of first
+    appearance). Partial graphs of consecutive parts are merged with ``add``.
+    """
+
+    def __init__(self, is_directed, gap=0):
+        self.is_directed = is_directed
+        self.gap = gap
+        self.node_table, self.node_keys = {}, []
+        self.link_keys, self.link_codes = np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        self.link_u, self.link_v = [], []
+        self.segments = []
+        self.min_t, self.max_t = math.inf, -math.inf
+
+    def _add_links(self, u, v, owners, begins, ends):
+        # Links (u[i],v[i]) and their intervals [begins[j],ends[j]] (of the link owners[j])
+        if self.is_directed:
+            codes = (u << 32) | v
+        else:
+            codes = (np.minimum(u, v) << 32) | np.maximum(u, v)
+        nb_links = len(self.link_keys)
+        l, self.link_keys, self.link_codes = _encode_int(codes, self.link_keys, self.link_codes)
+        # A new link keeps the orientation of its first appearance
+        new_links, first = np.unique(l, return_index=True)
+        first = first[new_links >= nb_links]
+        self.link_u.append(u[first])
+        self.link_v.append(v[first])
+        presence = storage.presence_from_intervals(l[owners], begins, ends, len(self.link_keys), self.gap)
+        self.segments.append((presence.segment_owner(), presence.begins, presence.ends))
+
+    def add_intervals(self, u, v, begins, ends):
+        """
+        Add the interactions (u[i],v[i]) during [begins[i],ends[i]].
+
+        :param u: Array of labels
+        :param v: Array of labels
+        :param begins: Array of beginnings
+        :param ends: Array of endings
+        """
+        self.min_t, self.max_t = min(self.min_t, float(begins.min())), max(self.max_t, float(ends.max()))
+        # Nodes are numbered in order of appearance (u then v)
+        uv = _encode(np.column_stack((u, v)).ravel(), self.node_table, self.node_keys).reshape(-1, 2)
+        self._add_links(uv[:, 0], uv[:, 1], np.arange(len(uv)), begins, ends)
+
+    def add(self, other):
+        """
+        Add the interactions of *other* (a partial graph of the next part of the dataset).
+
+        :param other: A ``_PartialGraph``
+        """
+        other.compact()
+        self.min_t, self.max_t = min(self.min_t, other.min_t), max(self.max_t, other.max_t)
+        if not other.node_keys:
+            return
+        nodes = _encode(np.array(other.node_keys, dtype=object), self.node_table, self.node_keys)
+        owners, begins, ends = other.segments[0]
+        self._add_links(nodes[other.link_u[0]], nodes[other.link_v[0]], owners, begins, ends)
+
+    def compact(self):
+        """
+        Concatenate links and merge their intervals.
+
+        :return: The partial graph itself
+        """
+        self.link_u = [np.concatenate(self.link_u) if self.link_u else np.zeros(0, dtype=np.int64)]
+        self.link_v = [np.concatenate(self.link_v) if self.link_v else np.zeros(0, dtype=np.int64)]
+        if self.segments:
+            owners, begins, ends = (np.concatenate(x) for x in zip(*self.segments))
+        else:
+            owners, begins, ends = np.zeros(0, dtype=np.int64), np.zeros(0), np.zeros(0)
+        presence = storage.presence_from_intervals(owners, begins, ends, len(self.link_keys), self.gap)
+        self.segments = [(presence.segment_owner(), presence.begins, presence.ends)]
+        return self
+
+
+def _csv_byte_ranges(input_file, n, ignore_header):
+    # Split a file in n ranges of bytes, ranges begin at the beginning of a line
+    size = os.path.getsize(input_file)
+    with open(input_file, 'rb') as file_input:
+        if ignore_header:
+            file_input.readline()
+        bounds = [file_input.tell()]
+        for i in range(1, n):
+            position = bounds[0] + (size - bounds[0]) * i // n
+            if position > bounds[-1]:
+                file_input.seek(position - 1)
+                file_input.readline()
+                bounds.append(min(file_input.tell(), size))
+        bounds.append(size)
+    return [(b, e) for b, e in zip(bounds[:-1], bounds[1:]) if e > b]
+
+
+def _time_columns(entry_format):
+    return [entry_format[k] for k in ('t_pos', 'b_pos', 'e_pos', 'link_duration_pos') if k in entry_format]
+
+
+def _add_chunk(partial, chunk, entry_format, ignore_blank=False, **kwargs):
+    """
+    Add a chunk of rows to a partial graph, self loops are ignored.
+
+    :param partial: A ``_PartialGraph``
+    :param chunk: A ``pandas.DataFrame`` whose columns are the positions of *entry_format*
+    :param entry_format: Positions of the fields
+    :param ignore_blank: Ignore blank labels ('' or ' ')
+    :param kwargs: Options of ``parser``
+    """
+    u, v = chunk[entry_format['u_pos']].to_numpy(), chunk[entry_format['v_pos']].to_numpy()
+    # Ignore blank nodes and self loops
+    keep = u != v
+    if ignore_blank:
+        keep &= (u != '') & (u != ' ') & (v != '') & (v != ' ')
+    if not keep.all():
+        chunk, u, v = chunk[keep], u[keep], v[keep]
+    if len(chunk) == 0:
+        return
+
+    if 't_pos' in entry_format:
+        t = _to_timestamps(chunk[entry_format['t_pos']], kwargs['time_is_datetime'], kwargs['time_format'])
+        link_duration = kwargs['link_duration'] or 0
+    else:
+        t = _to_timestamps(chunk[entry_format['b_pos']], kwargs['time_is_datetime'], kwargs['time_format'])
+        link_duration = _to_timestamps(chunk[entry_format['e_pos']], kwargs['time_is_datetime'],
+                                       kwargs['time_format']) - t
+    if 'link_duration_pos' in entry_format:
+        link_duration = _to_timestamps(chunk[entry_format['link_duration_pos']], False)
+    partial.add_intervals(u, v, t, t + link_duration)
+
+
+def _parse_csv_range(input_file, entry_format, start=None, end=None, progress=False, **kwargs):
+    """
+    Read the interactions of a CSV file (or of the bytes [start,end[ of the file) by chunks.
+
+    :return: A ``_PartialGraph``
+    """
+    u_pos, v_pos = entry_format['u_pos'], entry_format['v_pos']
+    dtype = {p: str for p in _time_columns(entry_format)}
+    label_type = str if kwargs['nodes_to_label'] else np.int64
+    dtype.update({u_pos: label_type, v_pos: label_type})
+    if start is None:
+        source, skiprows = open_file(input_file, 'rb'), 1 if kwargs['ignore_header'] else 0
+    else:
+        source, skiprows = io.BufferedReader(_FileRange(input_file, start, end)), 0
+    reader = pd.read_csv(source, sep=kwargs['delimiter'], header=None, skiprows=skiprows,
+                         usecols=sorted(dtype), dtype=dtype, keep_default_na=False,
+                         nrows=kwargs['nrows'], chunksize=kwargs['chunksize'])
+
+    partial = _PartialGraph(kwargs['is_directed'])
+    bar = tqdm(desc='Parsing CSV', unit=' rows', disable=not progress)
+    try:
+        for chunk in reader:
+            bar.update(len(chunk))
+            _add_chunk(partial, chunk, entry_format, ignore_blank=kwargs['nodes_to_label'], **kwargs)
+    finally:
+        bar.close()
+        reader.close()
+        source.close()
+    return partial.compact()
+
+
 def pcap_to_csv(file_input, destination, protocol=None):
     """
     Transform a pcap file to a csv
@@ -79,10 +405,9 @@ def pcap_to_csv(file_input, destination, protocol=None):
     counter = 0
     dict_ip = defaultdict(lambda: len(dict_ip))
     dict_label = {}
-    if protocol:
-        protocol = [key for key, value in __nb_2_protocol__.items() if value == protocol][0]
+    protocol = _protocol_number(protocol)
     print("protocol :", protocol)
-    with open(destination, 'w') as output, open(file_input, 'rb') as input:
+    with open_file(destination, 'w') as output, open_file(file_input, 'rb') as input:
         writer = csv.writer(output, delimiter=';')
         writer.writerow(["time", "src", "dst", "protocol", "len", "src_port", "dst_port"])
         for ts, pkt in tqdm(dpkt.pcap.Reader(input)):
@@ -146,7 +471,7 @@ def parse_net(input_file, output_file_nodes, output_file_links, link_duration=1)
     E = defaultdict(list)
     W = defaultdict(list)
     type_node = None
-    with open(input_file, 'r') as input_file:
+    with open_file(input_file, 'r') as input_file:
         for line in input_file:
             l = line.strip().split()
             if l[0] == '*Vertices':
@@ -185,13 +510,13 @@ def parse_net(input_file, output_file_nodes, output_file_links, link_duration=1)
                 else:
                     W[v] += [current_time, current_time + link_duration]
 
-    with open(output_file_links, 'w') as output_file:
+    with open_file(output_file_links, 'w') as output_file:
         for k, v in E.items():
             output_file.write(str(k[0]) + " " + str(k[1]) + " ")
             for t in v:
                 output_file.write(str(t) + " ")
             output_file.write("\n")
-    with open(output_file_nodes, 'w') as output_file:
+    with open_file(output_file_nodes, 'w') as output_file:
         for k, v in W.items():
             output_file.write(str(k) + " ")
             for t in v:
@@ -200,319 +525,197 @@ def parse_net(input_file, output_file_nodes, output_file_links, link_duration=1)
     return None
 
 
-def parse_csv(input_file, entry_format, **kwargs):
+def _partial_to_stream_graph(partial, **kwargs):
     """
-    Reader for .csv files
+    Build the stream graph of a (compacted) partial graph: node presences are the union of their links' presences.
 
-    :param input_file:
-    :param entry_format:
-    :param kwargs:
-    :return:
+    :param partial: A ``_PartialGraph``
+    :param kwargs: Options of ``parser``
+    :return: A ``StreamGraph``
     """
-    # Convert entry format
-    t_pos, b_pos, e_pos, link_duration_pos = None, None, None, None
-    if len(entry_format) == 3:
-        (t_pos, u_pos, v_pos) = entry_format['t_pos'], entry_format['u_pos'], entry_format['v_pos']
-    elif len(entry_format) == 4 and 'link_duration_pos' in entry_format:
-        (t_pos, link_duration_pos, u_pos, v_pos) = entry_format['t_pos'], entry_format['link_duration_pos'], \
-                                                   entry_format['u_pos'], entry_format['v_pos']
-    elif len(entry_format) == 4 and 'b_pos' in entry_format:
-        (b_pos, e_pos, u_pos, v_pos) = entry_format['b_pos'], entry_format['e_pos'], \
-                                       entry_format['u_pos'], entry_format['v_pos']
-    else:
-        raise TypeError("Entry format is not supported, see documentation !")
-    E = defaultdict(list)
-    W = defaultdict(list)
-    cnt_rows = 0
-
-    nodes_to_label = {}
-    label_to_id = defaultdict(lambda: len(label_to_id))
-
-    min_t, max_t = math.inf, -math.inf
-
-    with open(input_file, 'r') as input_file:
-
-        reader = csv.reader(input_file, delimiter=kwargs['delimiter'])
-
-        if kwargs['ignore_header']:
-            next(reader, None)
-
-        if kwargs['link_duration']:
-            link_duration = kwargs['link_duration']
-
-        elif 'link_duration_pos' not in entry_format and 'b_pos' not in entry_format:
-            link_duration = 0
-            print("[WARNING] No link_duration provided, links durations are set to 0.")
-
-        for line in tqdm(reader, desc='Parsing CSV', total=kwargs['nrows'] - 1):
-            cnt_rows += 1
-
-            if cnt_rows > kwargs['nrows']:
-                break
-
-            if kwargs['nodes_to_label']:
-                # Convert Label to int
-                u_label = line[u_pos]
-                v_label = line[v_pos]
-                if u_label in {'', ' '} or v_label in {'', ' '}:
-                    # print(" Blank node line:",cnt_rows)
-                    # print(" Content:",line)
-                    continue
-
-                if u_label == v_label:
-                    # SELF LOOP : we ignore it
-                    continue
-                # If we haven't these label before they are assigned to len(label_to_id) = new_id
-                u = label_to_id[u_label]
-                v = label_to_id[v_label]
-                nodes_to_label[u] = u_label
-                nodes_to_label[v] = v_label
-            else:
-                u = int(line[u_pos])
-                v = int(line[v_pos])
-                if u == v:
-                    # SELF LOOP : we ignore it
-                    continue
-
-            if kwargs['time_is_datetime']:
-                if 't_pos' in entry_format:
-                    t = datetime_to_timestamp(line[t_pos])
-                elif 'b_pos' in entry_format:
-                    b = datetime_to_timestamp(line[b_pos])
-                    e = datetime_to_timestamp(line[e_pos])
-                    link_duration = e - b
-                    t = b
-            else:
-                if 't_pos' in entry_format:
-                    t = float(line[t_pos].replace(',', ''))
-                elif 'b_pos' in entry_format:
-                    b = float(line[b_pos].replace(',', ''))
-                    e = float(line[e_pos].replace(',', ''))
-                    link_duration = e - b
-                    t = b
-
-            if 'link_duration_pos' in entry_format:
-                link_duration = float(line[link_duration_pos].replace(',', ''))
-
-            min_t, max_t = min(min_t, t), max(max_t, t + link_duration)
-
-            if kwargs['is_directed']:
-                l = (u, v)
-            else:
-                if (v, u) in E:
-                    l = (v, u)
-                else:
-                    l = (u, v)
-
-            if l in E and E[l][-1] >= t:
-                E[l][-1] = max(E[l][-1], t + link_duration)
-            else:
-                E[l] += [t, t + link_duration]
-            if kwargs['is_link_stream'] is False:
-                if u in W and W[u][-1] >= t:
-                    W[u][-1] = max(W[u][-1], t + link_duration)
-                else:
-                    W[u] += [t, t + link_duration]
-
-                if v in W and W[v][-1] >= t:
-                    W[v][-1] = max(W[v][-1], t + link_duration)
-                else:
-                    W[v] += [t, t + link_duration]
-            else:
-                W[u] = [min_t, max_t]
-                W[v] = [min_t, max_t]
-
+    node_keys, min_t, max_t = partial.node_keys, partial.min_t, partial.max_t
+    link_u, link_v = partial.link_u[0], partial.link_v[0]
+    owners, begins, ends = partial.segments[0]
+    link_presence = storage.PresenceArray(np.searchsorted(owners, np.arange(len(link_u) + 1)), begins, ends)
     if kwargs['is_link_stream'] is True:
-        W = {k: [min_t, max_t] for k in W.keys()}
-
+        node_presence = storage.PresenceArray(np.arange(len(node_keys) + 1),
+                                              np.full(len(node_keys), min_t, dtype=np.float64),
+                                              np.full(len(node_keys), max_t, dtype=np.float64))
+    else:
+        owner = link_presence.segment_owner()
+        node_presence = storage.presence_from_intervals(np.concatenate((link_u[owner], link_v[owner])),
+                                                        np.tile(link_presence.begins, 2),
+                                                        np.tile(link_presence.ends, 2),
+                                                        len(node_keys))
     if kwargs['delta']:
         delta = kwargs['delta']
         chrono = time.time()
-        W, E = approximate_events(W, E, delta)
+        node_presence, link_presence = storage.coarsen_presences([node_presence, link_presence], delta)
         print("\t Approximate events with delta :", delta, " in ", time.time() - chrono)
+    node_presence = node_presence.to_lists()
+    link_presence = link_presence.to_lists()
+
+    if kwargs['nodes_to_label']:
+        nodes = list(range(len(node_keys)))
+        nodes_to_label = dict(enumerate(node_keys))
+        links = list(zip(link_u.tolist(), link_v.tolist()))
+    else:
+        nodes = node_keys
+        nodes_to_label = {}
+        links = [(node_keys[a], node_keys[b]) for a, b in zip(link_u.tolist(), link_v.tolist())]
 
     S = sg.StreamGraph(times=[min_t, max_t],
-                       nodes=list(W.keys()),
-                       links=list(E.keys()),
-                       node_presence=[W[k] for k in W.keys()],
-                       link_presence=[E[k] for k in E.keys()],
+                       nodes=nodes,
+                       links=links,
+                       node_presence=node_presence,
+                       link_presence=link_presence,
                        node_to_label=nodes_to_label,
-                       node_to_id={i: i for i in W.keys()})
+                       node_to_id={i: i for i in nodes})
     return S
 
 
-def approximate_events(W, E, delta):
+def parse_csv(input_file, entry_format, **kwargs):
     """
-    Approximation method reducing the number of distinct event times while preserving connectivity properties
-    of the original dataset.
+    Reader for .csv files. The file is read by chunks of *chunksize* rows (see ``parser``), each chunk is
+    processed with ``numpy`` : labels encoding, times conversion, self loops filtering and merge of overlapping
+    intervals (per link and per node).
 
-    :param W:
-    :param E:
-    :param delta:
+    :param input_file:
+    :param entry_format:
+    :param kwargs:
     :return:
     """
-    # Seems strange but avoid float imprecision
-    event_times = sorted(set([t for np in W.values() for t in np] + [t for lp in E.values() for t in lp]))
-    t_old = event_times[0]
-    discretized_event_times = SortedSet()
-    discretized_event_times.add(t_old)
-    for t in event_times:
-        if t - t_old >= delta:
-            discretized_event_times.add(t)
-            t_old = t
-
-    new_W = {}
-    for n, np in W.items():
-        new_W[n] = []
-        for t0, t1 in zip(np[::2], np[1::2]):
-            assert t1 - t0 >= delta
-            if t0 not in discretized_event_times:
-                # # Catch time after t0 in discretized event times:
-                t0 = discretized_event_times[discretized_event_times.bisect(t0)]
-            if t1 not in discretized_event_times:
-                # #Catch time before t1 in discretize event times:
-                t1 = discretized_event_times[discretized_event_times.bisect(t1) - 1]
-
-            # # new_W[n] += [t0, t1]
-            # a, b = delta * math.ceil(t0 / delta), delta * math.floor(t1 / delta)
-            #
-            # if math.isclose(a, t0):
-            #     a = t0
-            # if math.isclose(b, t1):
-            #     b = t1
-            new_W[n] += [t0, t1]
-
-    new_E = {}
-    for l, lp in E.items():
-        new_E[l] = []
-        for t0, t1 in zip(lp[::2], lp[1::2]):
-            assert t1 - t0 >= delta
-            if t0 not in discretized_event_times:
-                # # Catch time after t0 in discretized event times:
-                t0 = discretized_event_times[discretized_event_times.bisect(t0)]
-            if t1 not in discretized_event_times:
-                # # Catch time before t1 in discretize event times:
-                t1 = discretized_event_times[discretized_event_times.bisect(t1) - 1]
-
-            # new_E[l] += [t0, t1]
-            # a, b = delta * math.ceil(t0 / delta), delta * math.floor(t1 / delta)
-            # if math.isclose(a, t0):
-            #     a = t0
-            # if math.isclose(b, t1):
-            #     b = t1
-            new_E[l] += [t0, t1]
-    return new_W, new_E
+    # Check entry format
+    if not (len(entry_format) == 3 and 't_pos' in entry_format or
+            len(entry_format) == 4 and ('link_duration_pos' in entry_format or 'b_pos' in entry_format)):
+        raise TypeError("Entry format is not supported, see documentation !")
+    if not kwargs['link_duration'] and 'link_duration_pos' not in entry_format and 'b_pos' not in entry_format:
+        print("[WARNING] No link_duration provided, links durations are set to 0.")
+
+    n_jobs = kwargs['n_jobs']
+    if n_jobs is not None and n_jobs < 0:
+        n_jobs = max(os.cpu_count() + 1 + n_jobs, 1)
+    # A compressed file can not be split in ranges of bytes
+    if n_jobs is None or n_jobs == 1 or kwargs['nrows'] is not None or infer_compression(input_file) is not None:
+        partial = _parse_csv_range(input_file, entry_format, progress=True, **kwargs)
+    else:
+        ranges = _csv_byte_ranges(input_file, n_jobs, kwargs['ignore_header'])
+        partials = Parallel(n_jobs=n_jobs)(delayed(_parse_csv_range)(input_file, entry_format, start, end, **kwargs)
+                                           for start, end in ranges)
+        # Labels and links are numbered in the order of the ranges, as with a single reader
+        partial = _PartialGraph(kwargs['is_directed'])
+        for p in partials:
+            partial.add(p)
+        partial.compact()
 
+    return _partial_to_stream_graph(partial, **kwargs)
 
-def parse_json(input_file, entry_format, **kwargs):
+
+def approximate_events(W, E, delta):
     """
-    A Stream Graph reader for JSON dataset.
+    Approximation method reducing the number of distinct event times while preserving connectivity properties
+    of the original dataset (see ``StreamGraph.coarsen``).
 
-    :param input_file:
-    :param entry_format:
-    :param kwargs:
-    :return:
+    :param W: Dictionary node -> node presence
+    :param E: Dictionary link -> link presence
+    :param delta: Minimal gap between two event times
+    :return: The approximated dictionaries (W, E)
     """
-    # Convert entry format
-    u_pos, v_pos, t_pos, b_pos, e_pos, link_duration_pos = None, None, None, None, None, None
-    if len(entry_format) == 3:
-        (t_pos, u_pos, v_pos) = entry_format['t_pos'], entry_format['u_pos'], entry_format['v_pos']
-    elif len(entry_format) == 4 and 'link_duration_pos' in entry_format:
-        (t_pos, link_duration_pos, u_pos, v_pos) = entry_format['t_pos'], entry_format['link_duration_pos'], \
-                                                   entry_format['u_pos'], entry_format['v_pos']
-    elif len(entry_format) == 4 and 'b_pos' in entry_format:
-        (b_pos, e_pos, u_pos, v_pos) = entry_format['b_pos'], entry_format['e_pos'], \
-                                       entry_format['u_pos'], entry_format['v_pos']
-    E = defaultdict(list)
-    W = defaultdict(list)
-    cnt_rows = 0
-    id_to_label = {}
-    label_to_id = defaultdict(lambda: len(label_to_id))
-    min_t, max_t = math.inf, -math.inf
+    node_presence, link_presence = storage.coarsen_presences([list(W.values()), list(E.values())], delta)
+    return dict(zip(W, node_presence.to_lists())), dict(zip(E, link_presence.to_lists()))
 
-    with open(input_file, 'r') as input_file:
-        reader = json.load(input_file)
-        for line in tqdm(reader, desc="Parsing JSON", total=kwargs['nrows']):
-            cnt_rows += 1
 
-            # if cnt_rows % 100000 == 0:
-            #     print((cnt_rows / kwargs['nrows']) * 100, "% loaded")
+def _iter_json_records(input_file, buffer_size=1 << 20):
+    """
+    Iterate over the records of a JSON file without loading it : either a top-level array of records (decoded
+    incrementally) or JSON lines (one record per line).
 
-            if cnt_rows > kwargs['nrows']:
+    :param input_file: Path of the file
+    :param buffer_size: Number of characters read at once
+    :return: A generator of records
+    """
+    decoder = json.JSONDecoder()
+    with open_file(input_file, 'r') as file_input:
+        buffer = file_input.read(buffer_size)
+        start = len(buffer) - len(buffer.lstrip())
+        # A top-level array of records begins with '[' followed by a record (a list or a dictionary),
+        # a line of JSON lines may be a list of fields.
+        head = buffer[start + 1:].lstrip()
+        while buffer[start:start + 1] == '[' and not head:
+            data = file_input.read(buffer_size)
+            if not data:
                 break
-            if kwargs['nodes_to_label']:
-                # Convert Label to int
-                u_label = line[u_pos]
-                v_label = line[v_pos]
-                # If we haven't these label before they are assigned to len(label_to_id = new_id)
-                u = label_to_id[u_label]
-                v = label_to_id[v_label]
-                id_to_label[u] = u_label
-                id_to_label[v] = v_label
-            else:
-                u = int(line[u_pos])
-                v = int(line[v_pos])
-
-            if kwargs['time_is_datetime']:
-                if 't_pos' in entry_format:
-                    t = datetime_to_timestamp(line[t_pos])
-                elif 'b_pos' in entry_format:
-                    b = datetime_to_timestamp(line[b_pos])
-                    e = datetime_to_timestamp(line[e_pos])
-                    link_duration = e - b
-                    t = b
-            else:
-                if 't_pos' in entry_format:
-                    t = float(line[t_pos].replace(',', ''))
-                elif 'b_pos' in entry_format:
-                    b = float(line[b_pos].replace(',', ''))
-                    e = float(line[e_pos].replace(',', ''))
-                    link_duration = e - b
-                    t = b
-
-            min_t, max_t = min(min_t, t), max(max_t, t + link_duration)
-
-            if kwargs['link_duration']:
-                link_duration = kwargs['link_duration']
-            elif 'link_duration_pos' in entry_format:
-                link_duration = float(line[link_duration_pos].replace(',', ''))
-
-            if kwargs['is_directed']:
-                l = (u, v)
-            else:
-                if (v, u) in E:
-                    l = (v, u)
-                else:
-                    l = (u, v)
-            if u == v:
-                # SELF LOOP : we ignore it
+            buffer += data
+            head = buffer[start + 1:].lstrip()
+        if buffer[start:start + 1] != '[' or head[:1] not in ('[', '{', ']'):
+            file_input.seek(0)
+            for line in file_input:
+                if line.strip():
+                    yield json.loads(line)
+            return
+
+        pos, eof = start + 1, False
+        while True:
+            # Skip whitespaces and separators, read more data if the next record may be incomplete
+            while pos < len(buffer) and (buffer[pos].isspace() or buffer[pos] == ','):
+                pos += 1
+            if pos < len(buffer) and buffer[pos] == ']':
+                return
+            try:
+                if pos == len(buffer):
+                    raise ValueError
+                record, end = decoder.raw_decode(buffer, pos)
+                if end == len(buffer) and not eof:
+                    raise ValueError
+            except ValueError:
+                if eof:
+                    raise ValueError("Invalid JSON array in " + str(input_file))
+                data = file_input.read(buffer_size)
+                eof = not data
+                buffer = buffer[pos:] + data
+                pos = 0
                 continue
+            yield record
+            pos = end
 
-            if l in E and E[l][-1] >= t:
-                E[l][-1] = max(E[l][-1], t + link_duration)
-            else:
-                E[l] += [t, t + link_duration]
-            if kwargs['is_link_stream'] is False:
-                if u in W and W[u][-1] >= t:
-                    W[u][-1] = max(W[u][-1], t + link_duration)
-                else:
-                    W[u] += [t, t + link_duration]
-
-                if v in W and W[v][-1] >= t:
-                    W[v][-1] = max(W[v][-1], t + link_duration)
-                else:
-                    W[v] += [t, t + link_duration]
-
-    S = sg.StreamGraph(times=[min_t, max_t],
-                       nodes=list(W.keys()),
-                       links=list(E.keys()),
-                       node_presence=[W[k] for k in W.keys()],
-                       link_presence=[E[k] for k in E.keys()],
-                       node_to_label=id_to_label)
-    return S
 
+def parse_json(input_file, entry_format, **kwargs):
+    """
+    A Stream Graph reader for JSON dataset : a top-level array of records or JSON lines (one record per line).
+    Records (lists or dictionaries) are streamed and processed by chunks of *chunksize* records, as in
+    ``parse_csv``.
 
-def parse_link_stream(input_file):
+    :param input_file:
+    :param entry_format:
+    :param kwargs:
+    :return:
+    """
+    if not (len(entry_format) == 3 and 't_pos' in entry_format or
+            len(entry_format) == 4 and ('link_duration_pos' in entry_format or 'b_pos' in entry_format)):
+        raise TypeError("Entry format is not supported, see documentation !")
+    positions = [entry_format['u_pos'], entry_format['v_pos']] + _time_columns(entry_format)
+
+    def add(records):
+        chunk = pd.DataFrame({p: pd.Series([r[p] for r in records], dtype=object) for p in positions})
+        if not kwargs['nodes_to_label']:
+            chunk[entry_format['u_pos']] = chunk[entry_format['u_pos']].astype(np.int64)
+            chunk[entry_format['v_pos']] = chunk[entry_format['v_pos']].astype(np.int64)
+        _add_chunk(partial, chunk, entry_format, **kwargs)
+
+    partial = _PartialGraph(kwargs['is_directed'])
+    records = []
+    for record in tqdm(itertools.islice(_iter_json_records(input_file), kwargs['nrows']),
+                       desc="Parsing JSON", unit=' records'):
+        records.append(record)
+        if len(records) == kwargs['chunksize']:
+            add(records)
+            records = []
+    if records:
+        add(records)
+    return _partial_to_stream_graph(partial.compact(), **kwargs)
+
+
+def parse_link_stream(input_file, chunksize=1000000, progress=True):
     """
     Parse link stream format:
     alpha t0
@@ -523,75 +726,147 @@ def parse_link_stream(input_file):
     .
     b e v w
 
-    :param input_file:
-    :return:
+    The file is read in a single pass by chunks of lines, links are undirected : (u,v) and (v,u) are the same link,
+    oriented as in its first appearance, and its overlapping intervals are merged.
+    Nodes are present during [alpha,omega] (default: the first and the last times of links).
+
+    :param input_file: Path of the file (possibly compressed, see ``open_file``)
+    :param chunksize: Number of lines read at once
+    :param progress: Display a progress bar (in bytes)
+    :return: A ``StreamGraph``
     """
-    E = defaultdict(list)
-    W = defaultdict(list)
-    cnt_rows = 0
-
-    nodes_to_label = {}
-    label_to_id = defaultdict(lambda: len(label_to_id))
-    with open(input_file, 'r') as ipt:
-        size = sum(1 for _ in ipt)
-
-    with open(input_file, 'r') as input_file:
-        for line in tqdm(input_file, total=size):
-            cnt_rows += 1
-            # if cnt_rows % 100000 == 0:
-            #     print((cnt_rows / size) * 100, "% loaded")
-            l = line.strip().split()
-            if len(l) == 2:
-                assert l[0] in ["alpha", "omega"]
-                if l[0] == "alpha":
-                    alpha = float(l[1])
-                else:
-                    omega = float(l[1])
+    alpha, omega = None, None
+    partial = _PartialGraph(is_directed=False)
+    total = os.path.getsize(input_file) if infer_compression(input_file) is None else None
+    bar = tqdm(desc='Parsing link stream', total=total, unit='B', unit_scale=True, disable=not progress)
+    with open_file(input_file, 'rb') as file_input:
+        reader = pd.read_csv(file_input, sep=r'\s+', header=None, names=range(4), dtype=str, keep_default_na=False,
+                             chunksize=chunksize)
+        for chunk in reader:
+            bar.update(file_input.tell() - bar.n)
+            bounds = chunk[2] == ''
+            if bounds.any():
+                for key, value in zip(chunk[0][bounds], chunk[1][bounds]):
+                    if key == 'alpha':
+                        alpha = float(value)
+                    elif key == 'omega':
+                        omega = float(value)
+                    else:
+                        raise ValueError("Invalid line in a link stream : " + key + " " + value)
+                chunk = chunk[~bounds]
+            if (chunk[3] == '').any():
+                raise ValueError("Lines of a link stream must be 'b e u v'.")
+            if len(chunk):
+                partial.add_intervals(chunk[2].to_numpy(), chunk[3].to_numpy(),
+                                      _to_timestamps(chunk[0], False), _to_timestamps(chunk[1], False))
+    bar.close()
+    partial.compact()
+    if alpha is not None:
+        partial.min_t = alpha
+    if omega is not None:
+        partial.max_t = omega
+    return _partial_to_stream_graph(partial, is_link_stream=True, nodes_to_label=True, delta=None)
+
+
+def _protocol_number(protocol):
+    # Protocol name (see __nb_2_protocol__) or number to number
+    if protocol is None or isinstance(protocol, int):
+        return protocol
+    return [key for key, value in __nb_2_protocol__.items() if value == protocol][0]
+
+
+def _iter_pcap_packets(file_input, protocol=None, ports=None):
+    """
+    Iterate over the IP packets (ICMP excepted) of a capture (pcap, or pcapng with dpkt >= 1.9.7). The capture is
+    read with ``dpkt``, headers are read in place : packets are filtered (protocol and ports) and addresses extracted
+    without decoding the payloads.
+
+    :param file_input: Path of the capture
+    :param protocol: Keep only this protocol (a name of ``__nb_2_protocol__`` or a number)
+    :param ports: Keep only TCP or UDP packets whose source or destination port is in *ports*
+    :return: A generator of (time since the first packet, source address, destination address)
+    """
+    protocol = _protocol_number(protocol)
+    ports = set(ports) if ports is not None else None
+    with open_file(file_input, 'rb') as input:
+        if hasattr(dpkt.pcap, 'UniversalReader'):
+            reader = dpkt.pcap.UniversalReader(input)
+        else:
+            # dpkt < 1.9.7 : pcap only
+            reader = dpkt.pcap.Reader(input)
+        datalink = reader.datalink()
+        t0 = None
+        for ts, pkt in reader:
+            if t0 is None:
+                t0 = ts
+            if datalink == dpkt.pcap.DLT_EN10MB:
+                ether_type, offset = struct.unpack_from('!H', pkt, 12)[0], 14
+                while ether_type in (0x8100, 0x88a8) and len(pkt) >= offset + 4:
+                    # VLAN tags
+                    ether_type, offset = struct.unpack_from('!H', pkt, offset + 2)[0], offset + 4
+            elif datalink == dpkt.pcap.DLT_LINUX_SLL:
+                ether_type, offset = struct.unpack_from('!H', pkt, 14)[0], 16
+            elif datalink in (dpkt.pcap.DLT_RAW, 14, 101):
+                ether_type, offset = {4: 0x0800, 6: 0x86DD}.get(pkt[0] >> 4 if pkt else 0), 0
             else:
-                assert (len(l) == 4)
-                b, e, u_label, v_label = l
-
-                u = label_to_id[u_label]
-                v = label_to_id[v_label]
-                nodes_to_label[u] = u_label
-                nodes_to_label[v] = v_label
-
-                b = float(b)
-                e = float(e)
-
-                l = (u, v)
-                if l in E:
-                    l = (v, u)
-                if l in E and E[l][-1] >= b:
-                    E[l][-1] = max(E[l][-1], e)
-                else:
-                    E[l] += [b, e]
-                if u not in W:
-                    W[u] = [alpha, omega]
-                if v not in W:
-                    W[v] = [alpha, omega]
-
-    S = sg.StreamGraph(times=[alpha, omega],
-                       nodes=list(W.keys()),
-                       links=list(E.keys()),
-                       node_presence=[W[k] for k in W.keys()],
-                       link_presence=[E[k] for k in E.keys()],
-                       node_to_label=nodes_to_label,
-                       node_to_id={i: i for i in W.keys()})
-    return S
+                raise ValueError("Unsupported link type : " + str(datalink))
+
+            if ether_type == 0x0800 and len(pkt) >= offset + 20:
+                p = pkt[offset + 9]
+                src, dst = pkt[offset + 12:offset + 16], pkt[offset + 16:offset + 20]
+                family, transport = socket.AF_INET, offset + (pkt[offset] & 0x0F) * 4
+            elif ether_type == 0x86DD and len(pkt) >= offset + 40:
+                p = pkt[offset + 6]
+                src, dst = pkt[offset + 8:offset + 24], pkt[offset + 24:offset + 40]
+                family, transport = socket.AF_INET6, offset + 40
+            else:
+                continue
+            # We ignore 'ICMP' protocols, ICMP scan useless
+            if p == 1 or (protocol is not None and p != protocol):
+                continue
+            if ports is not None:
+                if p not in (6, 17) or len(pkt) < transport + 4:
+                    continue
+                src_port, dst_port = struct.unpack_from('!HH', pkt, transport)
+                if src_port not in ports and dst_port not in ports:
+                    continue
+            yield round(ts - t0, 6), socket.inet_ntop(family, src), socket.inet_ntop(family, dst)
 
 
-def parse_pcap(file_input, entry_format, **options):
-    pcap_to_csv(file_input, "tmp.csv")
-    S = parse_csv("tmp.csv", entry_format, **options)
-    os.remove("tmp.csv")
-    return S
+def parse_pcap(file_input, entry_format=None, **options):
+    """
+    A Stream Graph reader for network captures (pcap, or pcapng with dpkt >= 1.9.7) : nodes are IP addresses
+    (labels) and each packet is an interaction between its source and its destination at its time (since the first
+    packet), during *link_duration*. Packets are streamed by chunks of *chunksize* packets, as in ``parse_csv``.
+
+    Specific options : 'protocol' (keep only this protocol, e.g. 'TCP'), 'ports' (keep only TCP or UDP packets
+    from or to these ports) and 'gap' (packets of a link separated by at most *gap* belong to the same presence).
+
+    :param file_input: Path of the capture
+    :param entry_format: Unused (fields of packets are fixed)
+    :param options: Options of ``parser``
+    :return: A ``StreamGraph``
+    """
+    kwargs = dict(options, time_is_datetime=False, nodes_to_label=True)
+    entry_format = {'t_pos': 't', 'u_pos': 'u', 'v_pos': 'v'}
+
+    partial = _PartialGraph(options['is_directed'], options['gap'] or 0)
+    packets = _iter_pcap_packets(file_input, options['protocol'], options['ports'])
+    packets = tqdm(itertools.islice(packets, options['nrows']), desc="Parsing PCAP", unit=' packets')
+    while True:
+        chunk = pd.DataFrame(itertools.islice(packets, options['chunksize']), columns=['t', 'u', 'v'])
+        if len(chunk) == 0:
+            break
+        _add_chunk(partial, chunk, entry_format, **kwargs)
+    partial.compact()
+    return _partial_to_stream_graph(partial, **kwargs)
 
 
 def parser(input_file, input_format, entry_format, output_file=None, simplify_presence=False, output_format='sg',
            **kwargs):
     """
-    Straph's tunable parser. Compatible with several data formats: CSV, TSV, JSon and PCAP.
+    Straph's tunable parser. Compatible with several data formats: CSV, TSV, JSon (or JSON lines) and PCAP.
+    Input files may be compressed (gzip, bz2, xz or zstd), the compression is detected from their extension.
 
     :param simplify_presence:
     :param input_file: Input FILE (name only)
@@ -599,20 +874,30 @@ def parser(input_file, input_format, entry_format, output_file=None, simplify_pr
     :param entry_format: Format of each line to be readed (t,u,v) = (line[x],line[y],line[w])
     :param output_file: Output FILE (name only)
     :param output_format: Format de sortie : SG,SGF,json
+    :param kwargs: Options, e.g. 'nrows' (maximum number of rows, default: all), 'chunksize' (number of rows
+        read at once in a CSV, default: 1000000), 'n_jobs' (number of processes parsing a CSV, each one reads a range
+        of lines, default: 1; fields must not contain line breaks, 'nrows' must not be set and the file must not
+        be compressed), 'time_format' (format of datetimes when 'time_is_datetime' is set, default: inferred,
+        see ``datetimes_to_timestamps``) or the options of ``parse_pcap``
     :return:
     """
-    with open(input_file) as ipt:
-        options = {'delimiter': ',',
-                   'is_link_stream': False,
-                   'is_directed': False,
-                   'nrows': sum(1 for _ in ipt),
-                   'link_duration': False,
-                   'order_sgf': False,
-                   'ignore_header': True,
-                   'nodes_to_label': False,
-                   'time_is_datetime': False,
-                   'delta': None,
-                   }
+    options = {'delimiter': ',',
+               'is_link_stream': False,
+               'is_directed': False,
+               'nrows': None,
+               'chunksize': 1000000,
+               'n_jobs': None,
+               'link_duration': False,
+               'order_sgf': False,
+               'ignore_header': True,
+               'nodes_to_label': False,
+               'time_is_datetime': False,
+               'time_format': None,
+               'delta': None,
+               'protocol': None,
+               'ports': None,
+               'gap': None,
+               }
     options.update(kwargs)
     if ('t_pos' in entry_format or 'link_duration_pos' in entry_format) and \
             ('b_pos' in entry_format or 'e_pos' in entry_format):
@@ -627,7 +912,7 @@ def parser(input_file, input_format, entry_format, output_file=None, simplify_pr
 
     if input_format == 'csv':
         S = parse_csv(input_file, entry_format, **options)
-    elif input_format == 'json':
+    elif input_format in ('json', 'jsonl'):
         S = parse_json(input_file, entry_format, **options)
     elif input_format == 'pcap':
         S = parse_pcap(input_file, entry_format, **options)
@@ -654,53 +939,102 @@ def parser(input_file, input_format, entry_format, output_file=None, simplify_pr
     return S
 
 
-def sort_csv(input_file, entry_format, output=None, **kwargs):
-    with open(input_file) as ipt:
-        options = {'delimiter': ',',
-                   'is_link_stream': False,
-                   'is_directed': False,
-                   'nrows': sum(1 for _ in ipt),
-                   'link_duration': False,
-                   'order_sgf': False,
-                   'ignore_header': True,
-                   'nodes_to_label': False,
-                   'time_is_datetime': False,
-                   'delta': None,
-                   }
-    options.update(kwargs)
+def _csv_runs(reader, key_pos, **options):
+    """
+    Read rows of a CSV by runs of options['run_size'] rows and sort each run (stable sort) by the time in
+    column *key_pos*.
 
-    list_lines = []
-    with open(input_file, 'r') as input:
-        reader = csv.reader(input, delimiter=options['delimiter'])
-        if options['ignore_header']:
-            next(reader, None)
-        for line in tqdm(reader, desc='Reading CSV before sorting', total=options['nrows']):
-            list_lines.append(line)
-
-    if len(entry_format) == 3:
-        (t_pos, u_pos, v_pos) = entry_format['t_pos'], entry_format['u_pos'], entry_format['v_pos']
-        if options['time_is_datetime']:
-            list_lines = sorted(list_lines, key=lambda x: datetime_to_timestamp(x[t_pos]))
-        else:
-            list_lines = sorted(list_lines, key=lambda x: float(x[t_pos]))
-    elif len(entry_format) == 4 and 'link_duration_pos' in entry_format:
-        (t_pos, link_duration_pos, u_pos, v_pos) = entry_format['t_pos'], entry_format['link_duration_pos'], \
-                                                   entry_format['u_pos'], entry_format['v_pos']
-        if options['time_is_datetime']:
-            list_lines = sorted(list_lines, key=lambda x: datetime_to_timestamp(x[t_pos]))
-        else:
-            list_lines = sorted(list_lines, key=lambda x: float(x[t_pos]))
-    elif len(entry_format) == 4 and 'b_pos' in entry_format:
-        (b_pos, e_pos, u_pos, v_pos) = entry_format['b_pos'], entry_format['e_pos'], \
-                                       entry_format['u_pos'], entry_format['v_pos']
+    :return: A generator of runs : (sorted keys, rows sorted by key)
+    """
+    progress = tqdm(desc='Reading CSV before sorting', unit=' rows')
+    while True:
+        rows = list(itertools.islice(reader, options['run_size']))
+        if not rows:
+            progress.close()
+            return
+        progress.update(len(rows))
+        keys = _to_timestamps(pd.Series([row[key_pos] for row in rows], dtype=object),
+                              options['time_is_datetime'], options['time_format'])
+        order = np.argsort(keys, kind='stable')
+        yield keys[order].tolist(), [rows[i] for i in order.tolist()]
+
+
+def _write_run(pairs, directory, delimiter):
+    # Write a sorted run (an iterable of (key, row)) in a temporary file, the key is stored (exactly) in the first
+    # column
+    with tempfile.NamedTemporaryFile('w', dir=directory, suffix='.csv', newline='', delete=False) as output:
+        csv.writer(output, delimiter=delimiter).writerows([repr(k)] + row for k, row in pairs)
+    return output.name
+
+
+def _read_run(path, delimiter, run_index):
+    with open(path, 'r', newline='') as input:
+        for row in csv.reader(input, delimiter=delimiter):
+            yield float(row[0]), run_index, row[1:]
+
+
+def _merge_runs(paths, directory, delimiter, max_runs=256):
+    """
+    K-way merge of sorted runs, by groups of at most *max_runs* files.
+    Ties are broken by the index of the run, hence the merge is stable.
 
-        if options['time_is_datetime']:
-            list_lines = sorted(list_lines, key=lambda x: datetime_to_timestamp(x[b_pos]))
-        else:
-            list_lines = sorted(list_lines, key=lambda x: float(x[b_pos]))
+    :return: A generator of (key, run index, row) sorted by key
+    """
+    while len(paths) > max_runs:
+        merged = []
+        for i in range(0, len(paths), max_runs):
+            group = paths[i:i + max_runs]
+            # The group is streamed from the merge to the new run
+            merged.append(_write_run(((k, row) for k, _, row in _merge_runs(group, directory, delimiter, max_runs)),
+                                     directory, delimiter))
+            for path in group:
+                os.remove(path)
+        paths = merged
+    return heapq.merge(*[_read_run(path, delimiter, i) for i, path in enumerate(paths)])
+
+
+def sort_csv(input_file, entry_format, output=None, **kwargs):
+    """
+    Sort the rows of a CSV by time (t_pos or b_pos), the sort is stable. Rows are sorted by runs of *run_size*
+    rows in memory : files with more rows are sorted with an external merge sort (sorted runs are stored in
+    temporary files, in *tmp_dir*, then merged).
+
+    :param input_file: Path of the CSV
+    :param entry_format: Positions of the fields (see ``parser``)
+    :param output: Path of the sorted CSV (default: *input_file*)
+    :param kwargs: Options of ``parser``, 'run_size' (default: 1000000) and 'tmp_dir' (default: system's default)
+    :return:
+    """
+    options = {'delimiter': ',',
+               'ignore_header': True,
+               'time_is_datetime': False,
+               'time_format': None,
+               'run_size': 1000000,
+               'tmp_dir': None,
+               }
+    options.update(kwargs)
+    if 't_pos' in entry_format:
+        key_pos = entry_format['t_pos']
+    elif 'b_pos' in entry_format:
+        key_pos = entry_format['b_pos']
+    else:
+        raise TypeError("Entry format is not supported, see documentation !")
     if output is None:
         output = input_file
-    with open(output, 'w', newline='') as output:
-        writer = csv.writer(output, delimiter=options['delimiter'])
-        for line in tqdm(list_lines, desc='Writing CSV'):
-            writer.writerow(line)
+
+    with tempfile.TemporaryDirectory(dir=options['tmp_dir']) as directory:
+        paths, rows = [], []
+        with open_file(input_file, 'r', newline='') as input:
+            reader = csv.reader(input, delimiter=options['delimiter'])
+            if options['ignore_header']:
+                next(reader, None)
+            for keys, rows in _csv_runs(reader, key_pos, **options):
+                if not paths and len(rows) < options['run_size']:
+                    # The whole file holds in a single run
+                    break
+                paths.append(_write_run(zip(keys, rows), directory, options['delimiter']))
+                rows = []
+        if paths:
+            rows = (row for _, _, row in _merge_runs(paths, directory, options['delimiter']))
+        with open_file(output, 'w', newline='') as output:
+            csv.writer(output, delimiter=options['delimiter']).writerows(rows)
@@ -87,14 +87,13 @@ class Path:
         for i in range(self.length()):
             l = self.links[i]
             l_ = (self.links[i][1], self.links[i][0])  # Inverse the order of the link
-            if l not in S.links and l_ not in S.links:
+            id_link = S.get_link_index(l)
+            if id_link is None:
+                id_link = S.get_link_index(l_)
+            if id_link is None:
                 raise ValueError("Link : " + str(l) + " does not exists in the Stream Graph !")
             else:
                 t = self.times[i]
-                if l in S.links:
-                    id_link = S.links.index(l)
-                else:
-                    id_link = S.links.index(l_)
                 is_present = False
                 for lt0, lt1 in zip(S.link_presence[id_link][::2], S.link_presence[id_link][1::2]):
                     if lt0 <= t <= lt1:
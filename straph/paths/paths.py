@@ -88,7 +88,8 @@ def L_Algorithm(S, source,
     Single Source Algorithm to compute temporal paths in Stream Graph
     IMPORTANT : We suppose that we are in the WCC of 'source' otherwise it's fucking expensive !
 
-    :param E:
+    :param E: An iterable of ordered events, iterated once (by default ``S.ordered_events()``). \
+    It can be a generator such as ``S.iter_events()``.
     :param sfp_special_case:
     :param is_temporal_source:
     :param start_time:
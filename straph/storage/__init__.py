@@ -0,0 +1,4 @@
+from straph.storage.columnar import *
+from straph.storage.event_index import *
+from straph.storage.time_index import *
+from straph.storage.binary import *
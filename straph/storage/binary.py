@@ -0,0 +1,293 @@
+# Copyright (C) 2017-2021 Léo Rannou - Sorbonne Université/LIP6 - Thales
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import numpy as np
+import struct
+from collections.abc import Mapping
+
+from straph.storage.columnar import (PresenceArray, LinkArray, NodeArray, ValueArray,
+                                     to_presence_array, to_link_array, to_value_array)
+
+# File layout :
+# - preamble : magic (8 bytes), version (uint32), reserved (uint32), header offset (uint64), header length (uint64)
+# - arrays : contiguous little-endian arrays, each one aligned on 8 bytes
+# - header : JSON with the description (dtype, offset, length) of each array, times and id
+# Labels and ids tables are stored as arrays too (version 2) : keys and values are either an array of integers or
+# encoded values (UTF-8 strings or JSON) concatenated in an array of bytes with an array of offsets.
+MAGIC = b"STRAPHSG"
+VERSION = 2
+PREAMBLE = struct.Struct("<8sIIQQ")
+ALIGNMENT = 8
+TABLES = ('node_to_label', 'node_to_id')
+
+
+def _json_default(x):
+    # numpy scalars (in labels or times)
+    if isinstance(x, np.generic):
+        return x.item()
+    raise TypeError("Object of type " + type(x).__name__ + " is not JSON serializable")
+
+
+def _decode_json(x):
+    # Tuples are stored as lists
+    return tuple(_decode_json(y) for y in x) if isinstance(x, list) else x
+
+
+def _decode_table(table):
+    # Tables stored in the JSON header (version 1)
+    if table is None:
+        return None
+    return {_decode_json(k): _decode_json(v) for k, v in table}
+
+
+def _encode_column(values):
+    """
+    Encode a column of keys or values of a table.
+
+    :param values: A list of values
+    :return: The kind of the column ('int', 'str' or 'json') and a list of (suffix, array)
+    """
+    if all(isinstance(x, (int, np.integer)) and not isinstance(x, bool) for x in values):
+        return 'int', [('', np.array(values, dtype=np.int64))]
+    if all(type(x) is str for x in values):
+        kind, encoded = 'str', [x.encode('utf-8') for x in values]
+    else:
+        kind, encoded = 'json', [json.dumps(x, default=_json_default).encode('utf-8') for x in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(x) for x in encoded], out=offsets[1:])
+    return kind, [('.offsets', offsets), ('.data', np.frombuffer(b"".join(encoded), dtype=np.uint8))]
+
+
+class _Column:
+    """
+    A column of a table stored in the binary format, values are decoded on access.
+    """
+
+    def __init__(self, kind, arrays, name):
+        self.kind = kind
+        if kind == 'int':
+            self.ids = arrays[name]
+        else:
+            self.offsets, self.data = arrays[name + '.offsets'], arrays[name + '.data']
+
+    def __len__(self):
+        return len(self.ids) if self.kind == 'int' else len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if self.kind == 'int':
+            return int(self.ids[i])
+        x = self.data[self.offsets[i]:self.offsets[i + 1]].tobytes().decode('utf-8')
+        return x if self.kind == 'str' else _decode_json(json.loads(x))
+
+    def tolist(self):
+        if self.kind == 'int':
+            return self.ids.tolist()
+        data = self.data.tobytes()
+        bounds = self.offsets.tolist()
+        values = [data[o0:o1].decode('utf-8') for o0, o1 in zip(bounds[:-1], bounds[1:])]
+        return values if self.kind == 'str' else [_decode_json(json.loads(x)) for x in values]
+
+
+class LabelTable(Mapping):
+    """
+    Read-only dictionary (node -> label or node -> id) stored in the binary format.
+    Nothing is decoded when the file is opened : an entry is decoded when it is accessed, integer keys are found
+    with a binary search (entries are sorted by key). Use ``dict(table)`` or ``to_dict`` to get a regular dictionary.
+    """
+
+    def __init__(self, keys, values):
+        """
+        A basic constructor for a ``LabelTable`` object
+
+        :param keys: A ``_Column`` of keys (sorted if they are integers)
+        :param values: A ``_Column`` of values
+        """
+        self.keys_column = keys
+        self.values_column = values
+        self._positions = None
+
+    def __repr__(self):
+        return "LabelTable(" + str(len(self)) + " entries)"
+
+    def __len__(self):
+        return len(self.keys_column)
+
+    def __iter__(self):
+        return iter(self.keys_column.tolist())
+
+    def _position(self, key):
+        if self.keys_column.kind == 'int':
+            if not isinstance(key, (int, np.integer)) or isinstance(key, bool):
+                return None
+            ids = self.keys_column.ids
+            pos = int(np.searchsorted(ids, key))
+            return pos if pos < len(ids) and ids[pos] == key else None
+        if self._positions is None:
+            self._positions = {k: i for i, k in enumerate(self.keys_column.tolist())}
+        return self._positions.get(key)
+
+    def __getitem__(self, key):
+        pos = self._position(key)
+        if pos is None:
+            raise KeyError(key)
+        return self.values_column[pos]
+
+    def __contains__(self, key):
+        return self._position(key) is not None
+
+    def items(self):
+        return list(zip(self.keys_column.tolist(), self.values_column.tolist()))
+
+    def values(self):
+        return self.values_column.tolist()
+
+    def to_dict(self):
+        """
+        Decode every entry.
+
+        :return: A dictionary
+        """
+        return dict(self.items())
+
+
+def _table_arrays(name, table):
+    # Arrays (and kinds of keys and values) of a table, entries are sorted by key if keys are integers
+    if isinstance(table, LabelTable):
+        keys, values = table.keys_column.tolist(), table.values_column.tolist()
+    else:
+        keys, values = list(table.keys()), list(table.values())
+    key_kind, key_arrays = _encode_column(keys)
+    if key_kind == 'int':
+        order = np.argsort(key_arrays[0][1], kind='stable')
+        key_arrays = [('', key_arrays[0][1][order])]
+        values = [values[i] for i in order.tolist()]
+    value_kind, value_arrays = _encode_column(values)
+    arrays = [(name + '.keys' + suffix, array) for suffix, array in key_arrays]
+    arrays += [(name + '.values' + suffix, array) for suffix, array in value_arrays]
+    return {'keys': key_kind, 'values': value_kind}, arrays
+
+
+def write_binary(path, nodes, node_presence, links, link_presence, times=None, id=None,
+                 node_to_label=None, node_to_id=None, weights=None, trips=None):
+    """
+    Write a stream graph to the binary format (see ``read_binary``).
+
+    :param path: Path of the output file
+    :param nodes: A list of nodes or a ``NodeArray``
+    :param node_presence: A list of presences or a ``PresenceArray``
+    :param links: A list of links or a ``LinkArray``
+    :param link_presence: A list of presences or a ``PresenceArray``
+    :param times: Time window of the stream graph
+    :param id: Identifier of the stream graph
+    :param node_to_label: Dictionary node -> label
+    :param node_to_id: Dictionary node -> id
+    :param weights: Weights of links' segments (a list of lists or a ``ValueArray``, in the same order as
+        *link_presence*)
+    :param trips: Trips of links' segments (a list of lists or a ``ValueArray``, in the same order as
+        *link_presence*)
+    :return:
+    """
+    node_presence = to_presence_array(node_presence)
+    link_presence = to_presence_array(link_presence)
+    links = to_link_array(links)
+    arrays = [('nodes', np.asarray(nodes, dtype=np.int64)),
+              ('node_offsets', node_presence.offsets),
+              ('node_begins', node_presence.begins),
+              ('node_ends', node_presence.ends),
+              ('link_u', links.u),
+              ('link_v', links.v),
+              ('link_offsets', link_presence.offsets),
+              ('link_begins', link_presence.begins),
+              ('link_ends', link_presence.ends)]
+    if weights:
+        arrays.append(('weights', to_value_array(weights).values))
+    if trips:
+        arrays.append(('trips', to_value_array(trips).values))
+    tables = {}
+    for name, table in zip(TABLES, (node_to_label, node_to_id)):
+        if table is not None:
+            tables[name], table_arrays = _table_arrays(name, table)
+            arrays += table_arrays
+
+    description = {}
+    with open(path, 'wb') as output:
+        output.write(b"\0" * PREAMBLE.size)
+        for name, array in arrays:
+            array = np.ascontiguousarray(array, dtype=array.dtype.newbyteorder('<'))
+            offset = output.tell()
+            output.write(array.tobytes())
+            output.write(b"\0" * (-output.tell() % ALIGNMENT))
+            description[name] = [array.dtype.str, offset, len(array)]
+        header = json.dumps({'id': id,
+                             'times': list(times) if times is not None else None,
+                             'arrays': description,
+                             'tables': tables},
+                            default=_json_default).encode('utf-8')
+        header_offset = output.tell()
+        output.write(header)
+        output.seek(0)
+        output.write(PREAMBLE.pack(MAGIC, VERSION, 0, header_offset, len(header)))
+
+
+def read_binary(path, mmap=True):
+    """
+    Read a stream graph stored in the binary format.
+    With *mmap* the arrays are memory-mapped (read-only) : nodes, presences, links, weights and trips stay in
+    columnar storages over the mapped arrays and labels and ids tables are ``LabelTable`` decoding an entry when
+    it is accessed, hence opening the file doesn't depend on its size and data is paged in on demand.
+
+    :param path: Path of the file
+    :param mmap: Memory-map the arrays instead of reading them
+    :return: A dictionary with the keys of ``StreamGraph`` constructor, nodes, presences, links, weights and trips
+        in a columnar storage.
+    """
+    with open(path, 'rb') as file_input:
+        magic, version, _, header_offset, header_length = PREAMBLE.unpack(file_input.read(PREAMBLE.size))
+        if magic != MAGIC:
+            raise ValueError("Not a stream graph binary file : " + str(path))
+        if version > VERSION:
+            raise ValueError("Unsupported version of the binary format : " + str(version))
+        file_input.seek(header_offset)
+        header = json.loads(file_input.read(header_length).decode('utf-8'))
+
+        arrays = {}
+        for name, (dtype, offset, length) in header['arrays'].items():
+            if length == 0:
+                arrays[name] = np.zeros(0, dtype=dtype)
+            elif mmap:
+                arrays[name] = np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=(length,))
+            else:
+                file_input.seek(offset)
+                arrays[name] = np.fromfile(file_input, dtype=dtype, count=length)
+
+    if version == 1:
+        tables = {name: _decode_table(header[name]) for name in TABLES}
+    else:
+        tables = {name: None for name in TABLES}
+        for name, kinds in header['tables'].items():
+            tables[name] = LabelTable(_Column(kinds['keys'], arrays, name + '.keys'),
+                                      _Column(kinds['values'], arrays, name + '.values'))
+
+    link_offsets = arrays['link_offsets']
+    return {'id': header['id'],
+            'times': header['times'],
+            'nodes': NodeArray(arrays['nodes']),
+            'node_presence': PresenceArray(arrays['node_offsets'], arrays['node_begins'], arrays['node_ends']),
+            'links': LinkArray(arrays['link_u'], arrays['link_v']),
+            'link_presence': PresenceArray(link_offsets, arrays['link_begins'], arrays['link_ends']),
+            'node_to_label': tables['node_to_label'],
+            'node_to_id': tables['node_to_id'],
+            'weights': ValueArray(link_offsets, arrays['weights']) if 'weights' in arrays else None,
+            'trips': ValueArray(link_offsets, arrays['trips']) if 'trips' in arrays else None}
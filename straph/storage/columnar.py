@@ -0,0 +1,656 @@
+# Copyright (C) 2017-2021 Léo Rannou - Sorbonne Université/LIP6 - Thales
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import bisect
+import gc
+import itertools
+import numpy as np
+
+
+class PresenceArray:
+    """
+    Columnar storage of presence times (of nodes or links).
+
+    Segments of the i-th element are stored in ``begins[offsets[i]:offsets[i+1]]`` and
+    ``ends[offsets[i]:offsets[i+1]]`` (CSR layout). Indexing a ``PresenceArray`` returns the usual
+    flat presence list [b,e,b',e',...] so it can be used wherever a list of presences is expected.
+    """
+
+    def __init__(self, offsets, begins, ends):
+        """
+        A basic constructor for a ``PresenceArray`` object
+
+        :param offsets: Array (int64) of size k+1, offsets[i] is the index of the first segment of the i-th element
+        :param begins: Array (float64) of segments' beginnings
+        :param ends: Array (float64) of segments' endings
+        """
+        self.offsets = offsets
+        self.begins = begins
+        self.ends = ends
+
+    def __repr__(self):
+        return "PresenceArray(" + str(len(self)) + " elements, " + str(self.nb_segments()) + " segments)"
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            start, stop, step = i.indices(len(self))
+            if step != 1:
+                return [self[j] for j in range(start, stop, step)]
+            stop = max(start, stop)
+            o0, o1 = self.offsets[start], self.offsets[stop]
+            return PresenceArray(self.offsets[start:stop + 1] - o0, self.begins[o0:o1], self.ends[o0:o1]).to_lists()
+        if i < 0:
+            i += len(self)
+        o0, o1 = self.offsets[i], self.offsets[i + 1]
+        presence = np.empty(2 * (o1 - o0))
+        presence[0::2] = self.begins[o0:o1]
+        presence[1::2] = self.ends[o0:o1]
+        return presence.tolist()
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    @property
+    def nbytes(self):
+        return self.offsets.nbytes + self.begins.nbytes + self.ends.nbytes
+
+    def nb_segments(self):
+        """
+        Total number of segments.
+
+        :return: An integer
+        """
+        return int(self.offsets[-1])
+
+    def segment_counts(self):
+        """
+        Number of segments of each element.
+
+        :return: An array of size k
+        """
+        return np.diff(self.offsets)
+
+    def segment_owner(self):
+        """
+        Index of the element owning each segment.
+
+        :return: An array of size nb_segments()
+        """
+        return np.repeat(np.arange(len(self)), self.segment_counts())
+
+    def durations(self):
+        """
+        Duration of each segment.
+
+        :return: An array of size nb_segments()
+        """
+        return self.ends - self.begins
+
+    def times(self):
+        """
+        Every time (beginnings and endings) of the presences.
+
+        :return: An array of size 2*nb_segments()
+        """
+        return np.concatenate((self.begins, self.ends))
+
+    def locate(self, owners, t0, t1=None):
+        """
+        For each query (owners[i], t0[i], t1[i]) return the index of the segment of the element owners[i]
+        containing [t0[i],t1[i]], -1 if there is none. Segments of each element must be sorted and disjoint.
+
+        :param owners: Array of element indexes
+        :param t0: Array of beginnings
+        :param t1: Array of endings (default: t0, i.e. the segment containing the instant t0)
+        :return: An array (int64) of segment indexes
+        """
+        owners = np.asarray(owners, dtype=np.int64)
+        t0 = np.asarray(t0, dtype=np.float64)
+        t1 = t0 if t1 is None else np.asarray(t1, dtype=np.float64)
+        nb_seg, nb_q = self.nb_segments(), len(owners)
+        seg_owner = self.segment_owner()
+        # Merge segments and queries on (owner, time), segments first on ties: the last segment
+        # seen before a query is the only candidate to contain it.
+        order = np.lexsort((np.concatenate((np.zeros(nb_seg, dtype=np.int8), np.ones(nb_q, dtype=np.int8))),
+                            np.concatenate((self.begins, t0)),
+                            np.concatenate((seg_owner, owners))))
+        is_seg = order < nb_seg
+        last = np.maximum.accumulate(np.where(is_seg, order, -1)) if len(order) else order
+        candidates = last[~is_seg]
+        queries = order[~is_seg] - nb_seg
+        result = np.full(nb_q, -1, dtype=np.int64)
+        valid = candidates >= 0
+        candidates, queries = candidates[valid], queries[valid]
+        valid = (seg_owner[candidates] == owners[queries]) & (self.ends[candidates] >= t1[queries])
+        result[queries[valid]] = candidates[valid]
+        return result
+
+    def to_lists(self):
+        """
+        Convert back to a list of presences: [[b,e,b',e',...],...]
+
+        :return: A list of lists
+        """
+        times = np.empty(2 * self.nb_segments())
+        times[0::2] = self.begins
+        times[1::2] = self.ends
+        times = times.tolist()
+        bounds = (2 * self.offsets).tolist()
+        # Lists of floats can't hold cycles : the garbage collector would only slow down their creation
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return [times[o0:o1] for o0, o1 in zip(bounds[:-1], bounds[1:])]
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+
+class LinkArray:
+    """
+    Columnar storage of links: two arrays (int32) of extremities.
+    Indexing a ``LinkArray`` returns the usual (u,v) tuple.
+    """
+
+    def __init__(self, u, v):
+        """
+        A basic constructor for a ``LinkArray`` object
+
+        :param u: Array (int32) of the first extremity of each link
+        :param v: Array (int32) of the second extremity of each link
+        """
+        self.u = u
+        self.v = v
+
+    def __repr__(self):
+        return "LinkArray(" + str(len(self)) + " links)"
+
+    def __len__(self):
+        return len(self.u)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return list(zip(self.u[i].tolist(), self.v[i].tolist()))
+        return int(self.u[i]), int(self.v[i])
+
+    def __iter__(self):
+        return zip(self.u.tolist(), self.v.tolist())
+
+    def __contains__(self, l):
+        return bool(np.any((self.u == l[0]) & (self.v == l[1])))
+
+    @property
+    def nbytes(self):
+        return self.u.nbytes + self.v.nbytes
+
+    def index(self, l):
+        """
+        Position of the link *l*, raise a ValueError if *l* isn't present (as ``list.index``).
+
+        :param l: A link (u,v)
+        :return: An integer
+        """
+        pos = np.flatnonzero((self.u == l[0]) & (self.v == l[1]))
+        if len(pos) == 0:
+            raise ValueError(str(l) + " is not in LinkArray")
+        return int(pos[0])
+
+    def to_lists(self):
+        """
+        Convert back to a list of links: [(u,v),...]
+
+        :return: A list of tuples
+        """
+        return list(self)
+
+
+class NodeArray:
+    """
+    Columnar storage of nodes: an array (int64) of nodes.
+    Indexing a ``NodeArray`` returns the usual integer.
+    """
+
+    def __init__(self, ids):
+        """
+        A basic constructor for a ``NodeArray`` object
+
+        :param ids: Array (int64) of nodes
+        """
+        self.ids = ids
+
+    def __repr__(self):
+        return "NodeArray(" + str(len(self)) + " nodes)"
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return self.ids[i].tolist()
+        return int(self.ids[i])
+
+    def __iter__(self):
+        return iter(self.ids.tolist())
+
+    def __contains__(self, n):
+        return bool(np.any(self.ids == n))
+
+    def __array__(self, dtype=None, copy=None):
+        return np.asarray(self.ids, dtype=dtype)
+
+    @property
+    def nbytes(self):
+        return self.ids.nbytes
+
+    def index(self, n):
+        """
+        Position of the node *n*, raise a ValueError if *n* isn't present (as ``list.index``).
+
+        :param n: A node
+        :return: An integer
+        """
+        pos = np.flatnonzero(self.ids == n)
+        if len(pos) == 0:
+            raise ValueError(str(n) + " is not in NodeArray")
+        return int(pos[0])
+
+    def to_lists(self):
+        """
+        Convert back to a list of nodes.
+
+        :return: A list of integers
+        """
+        return self.ids.tolist()
+
+
+class ValueArray:
+    """
+    Columnar storage of values attached to each segment of links (weights or trips).
+
+    Values of the i-th link are stored in ``values[offsets[i]:offsets[i+1]]`` (CSR layout, as ``PresenceArray``).
+    Indexing a ``ValueArray`` returns the usual list of values.
+    """
+
+    def __init__(self, offsets, values):
+        """
+        A basic constructor for a ``ValueArray`` object
+
+        :param offsets: Array (int64) of size k+1, offsets[i] is the index of the first value of the i-th element
+        :param values: Array (float64) of values
+        """
+        self.offsets = offsets
+        self.values = values
+
+    def __repr__(self):
+        return "ValueArray(" + str(len(self)) + " elements, " + str(len(self.values)) + " values)"
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        return self.values[self.offsets[i]:self.offsets[i + 1]].tolist()
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    @property
+    def nbytes(self):
+        return self.offsets.nbytes + self.values.nbytes
+
+    def to_lists(self):
+        """
+        Convert back to a list of lists of values.
+
+        :return: A list of lists
+        """
+        values = self.values.tolist()
+        bounds = self.offsets.tolist()
+        return [values[o0:o1] for o0, o1 in zip(bounds[:-1], bounds[1:])]
+
+
+class ClippedPresence:
+    """
+    Lazy view of presence times (a list of presences or a ``PresenceArray``) clipped to the time window [a,b].
+    Nothing is copied : the clipped presence of an element is computed with a binary search when it is accessed.
+    Nested views are composed by intersecting their windows, every presence is empty if the intersection is.
+    """
+
+    def __init__(self, presence, a, b):
+        """
+        A basic constructor for a ``ClippedPresence`` object
+
+        :param presence: A list of presences [[b,e,b',e',...],...], a ``PresenceArray`` or a ``ClippedPresence``
+        :param a: Beginning of the time window
+        :param b: Ending of the time window
+        """
+        if isinstance(presence, ClippedPresence):
+            presence, a, b = presence.presence, max(a, presence.a), min(b, presence.b)
+        self.presence = presence
+        self.a = a
+        self.b = b
+
+    def __repr__(self):
+        return "ClippedPresence(" + str(len(self)) + " elements, [" + str(self.a) + "," + str(self.b) + "])"
+
+    def __len__(self):
+        return len(self.presence)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        a, b = self.a, self.b
+        if a > b:
+            return []
+        if isinstance(self.presence, PresenceArray):
+            if i < 0:
+                i += len(self)
+            o0, o1 = self.presence.offsets[i], self.presence.offsets[i + 1]
+            s0 = o0 + np.searchsorted(self.presence.ends[o0:o1], a, side='left')
+            s1 = o0 + np.searchsorted(self.presence.begins[o0:o1], b, side='right')
+            if s0 >= s1:
+                return []
+            presence = np.empty(2 * (s1 - s0))
+            presence[0::2] = self.presence.begins[s0:s1]
+            presence[1::2] = self.presence.ends[s0:s1]
+        else:
+            presence = self.presence[i]
+            # First segment ending after a and last segment beginning before b
+            s0 = bisect.bisect_left(presence, a) // 2 * 2
+            s1 = (bisect.bisect_right(presence, b) + 1) // 2 * 2
+            if s0 >= s1:
+                return []
+            presence = presence[s0:s1]
+        presence[0] = max(a, presence[0])
+        presence[-1] = min(b, presence[-1])
+        return presence if isinstance(presence, list) else presence.tolist()
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def to_presence_array(self):
+        """
+        Materialize the clipped presence in a columnar storage.
+
+        :return: A ``PresenceArray``
+        """
+        presence = to_presence_array(self.presence)
+        mask = (presence.begins <= self.b) & (presence.ends >= self.a) & (self.a <= self.b)
+        counts = np.bincount(presence.segment_owner()[mask], minlength=len(presence))
+        offsets = np.zeros(len(presence) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        return PresenceArray(offsets,
+                             np.maximum(presence.begins[mask], self.a),
+                             np.minimum(presence.ends[mask], self.b))
+
+    def to_lists(self):
+        """
+        Materialize the clipped presence as a list of presences: [[b,e,b',e',...],...]
+
+        :return: A list of lists
+        """
+        return list(self)
+
+
+def to_presence_array(presence):
+    """
+    Return the columnar version of *presence* (no copy if it is already a ``PresenceArray``).
+
+    :param presence: A list of presences [[b,e,b',e',...],...] or a ``PresenceArray``
+    :return: A ``PresenceArray``
+    """
+    if isinstance(presence, PresenceArray):
+        return presence
+    if isinstance(presence, ClippedPresence):
+        return presence.to_presence_array()
+    counts = [len(p) // 2 for p in presence]
+    offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    times = np.fromiter(itertools.chain.from_iterable(presence), dtype=np.float64, count=2 * int(offsets[-1]))
+    return PresenceArray(offsets, times[0::2].copy(), times[1::2].copy())
+
+
+def to_link_array(links):
+    """
+    Return the columnar version of *links* (no copy if it is already a ``LinkArray``).
+
+    :param links: A list of links [(u,v),...] or a ``LinkArray``
+    :return: A ``LinkArray``
+    """
+    if isinstance(links, LinkArray):
+        return links
+    uv = np.fromiter(itertools.chain.from_iterable(links), dtype=np.int32, count=2 * len(links))
+    return LinkArray(uv[0::2].copy(), uv[1::2].copy())
+
+
+def to_value_array(values):
+    """
+    Return the columnar version of *values* (no copy if it is already a ``ValueArray``).
+
+    :param values: A list of lists of values [[w,w',...],...] or a ``ValueArray``
+    :return: A ``ValueArray``
+    """
+    if isinstance(values, ValueArray):
+        return values
+    counts = [len(x) for x in values]
+    offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    return ValueArray(offsets, np.fromiter(itertools.chain.from_iterable(values), dtype=np.float64,
+                                           count=int(offsets[-1])))
+
+
+def presence_from_intervals(owners, begins, ends, nb_owners=None, gap=0):
+    """
+    Build presences from unordered intervals [begins[i],ends[i]] of the elements owners[i] : intervals of an element
+    are sorted and overlapping (or touching) ones are merged.
+
+    :param owners: Array of element indexes
+    :param begins: Array of intervals' beginnings
+    :param ends: Array of intervals' endings
+    :param nb_owners: Number of elements (default: max(owners) + 1)
+    :param gap: Intervals separated by at most *gap* are merged too
+    :return: A ``PresenceArray``
+    """
+    owners = np.asarray(owners, dtype=np.int64)
+    begins = np.asarray(begins, dtype=np.float64)
+    ends = np.asarray(ends, dtype=np.float64)
+    n = len(owners)
+    if nb_owners is None:
+        nb_owners = int(owners.max()) + 1 if n else 0
+    if n == 0:
+        return PresenceArray(np.zeros(nb_owners + 1, dtype=np.int64), np.zeros(0), np.zeros(0))
+    order = np.lexsort((begins, owners))
+    owners, begins, ends = owners[order], begins[order], ends[order]
+    # Running maximum of ends inside each element : ranks of ends are shifted by owner * n so that a single
+    # cumulative maximum never crosses elements' boundaries
+    by_end = np.argsort(ends, kind='stable')
+    rank = np.empty(n, dtype=np.int64)
+    rank[by_end] = np.arange(n)
+    running = np.maximum.accumulate(owners * n + rank) - owners * n
+    running_end = ends[by_end[running]]
+    starts = np.ones(n, dtype=bool)
+    starts[1:] = (owners[1:] != owners[:-1]) | (begins[1:] > running_end[:-1] + gap)
+    starts = np.flatnonzero(starts)
+    offsets = np.zeros(nb_owners + 1, dtype=np.int64)
+    np.cumsum(np.bincount(owners[starts], minlength=nb_owners), out=offsets[1:])
+    return PresenceArray(offsets, begins[starts], running_end[np.append(starts[1:] - 1, n - 1)])
+
+
+def discretize_times(times, delta):
+    """
+    Greedy discretization of *times* : the first time is kept, then each time at least *delta* after the
+    previously kept one.
+
+    :param times: Array of times (unordered, possibly repeated)
+    :param delta: Minimal gap between two kept times (> 0)
+    :return: A sorted array of kept times
+    """
+    times = np.unique(np.asarray(times, dtype=np.float64))
+    n = len(times)
+    if n == 0:
+        return times
+    # Index of the first time t such that t - times[i] >= delta, for each i (searchsorted on times + delta may be
+    # off by one because of rounding, the exact comparison is then fixed)
+    index = np.arange(n)
+    following = np.searchsorted(times, times + delta, side='left')
+    while True:
+        backward = (following - 1 > index) & (times[np.minimum(following - 1, n - 1)] - times >= delta)
+        forward = (following < n) & (times[np.minimum(following, n - 1)] - times < delta)
+        if not (backward.any() or forward.any()):
+            break
+        following += forward.astype(np.int64) - backward.astype(np.int64)
+    following = following.tolist()
+    kept = []
+    i = 0
+    while i < n:
+        kept.append(i)
+        i = following[i]
+    return times[kept]
+
+
+def coarsen_presences(presences, delta):
+    """
+    Approximation reducing the number of distinct times of presences while preserving connectivity properties :
+    times are discretized (see ``discretize_times``) and each segment [b,e] is shrunk to [first kept time >= b,
+    last kept time <= e]. Every segment must last at least *delta*.
+
+    :param presences: A list of presences (lists of presences or ``PresenceArray``), discretized together
+    :param delta: Minimal gap between two kept times (> 0)
+    :return: A list of ``PresenceArray``, in the same order as *presences*
+    """
+    presences = [to_presence_array(presence) for presence in presences]
+    for presence in presences:
+        if presence.nb_segments() and presence.durations().min() < delta:
+            raise ValueError("Every segment must last at least delta (" + str(delta) + ") to be coarsened.")
+    times = discretize_times(np.concatenate([presence.times() for presence in presences]), delta)
+    return [PresenceArray(presence.offsets,
+                          times[np.searchsorted(times, presence.begins, side='left')],
+                          times[np.searchsorted(times, presence.ends, side='right') - 1])
+            for presence in presences]
+
+
+def pairwise_overlaps(presence, first, second):
+    """
+    Duration of the intersection of the presences of the elements first[i] and second[i], for each i.
+    Segments of both elements are merged in order of beginning : a segment may only intersect the last segment of
+    the other element beginning before it, hence each intersection is found in a single pass.
+
+    :param presence: A list of presences or a ``PresenceArray``
+    :param first: Array of elements' indexes
+    :param second: Array of elements' indexes
+    :return: An array (float64) of size len(first)
+    """
+    presence = to_presence_array(presence)
+    counts = presence.segment_counts()
+    nb_queries = len(first)
+    queries, sides, segments = [], [], []
+    for side, elements in enumerate((first, second)):
+        elements = np.asarray(elements, dtype=np.int64)
+        c = counts[elements]
+        queries.append(np.repeat(np.arange(nb_queries), c))
+        sides.append(np.full(c.sum(), side, dtype=np.int8))
+        # Index of each segment of each element : offset of the element + rank of the segment
+        segments.append(np.repeat(presence.offsets[elements] - np.cumsum(c) + c, c) + np.arange(c.sum()))
+    queries, sides, segments = np.concatenate(queries), np.concatenate(sides), np.concatenate(segments)
+    begins, ends = presence.begins[segments], presence.ends[segments]
+    order = np.lexsort((begins, queries))
+    queries, sides, begins, ends = queries[order], sides[order], begins[order], ends[order]
+
+    overlaps = np.zeros(nb_queries)
+    index = np.arange(len(queries))
+    for side in (0, 1):
+        # Last segment of the other element beginning before each segment of this side
+        last = np.maximum.accumulate(np.where(sides != side, index, -1))
+        valid = (sides == side) & (last >= 0)
+        i, j = index[valid], last[valid]
+        same_query = queries[j] == queries[i]
+        i, j = i[same_query], j[same_query]
+        overlap = np.minimum(ends[i], ends[j]) - begins[i]
+        intersect = overlap >= 0
+        overlaps += np.bincount(queries[i][intersect], weights=overlap[intersect], minlength=nb_queries)
+    return overlaps
+
+
+def copresence_durations(presence):
+    """
+    For each element, the sum over the other elements of the duration of their co-presence : the integral over its
+    presence of the number of other elements present, computed with a sweep over sorted events.
+    Segments of each element must be disjoint.
+
+    :param presence: A list of presences or a ``PresenceArray``
+    :return: An array (float64) of size the number of elements
+    """
+    presence = to_presence_array(presence)
+    nb_segments = presence.nb_segments()
+    if nb_segments == 0:
+        return np.zeros(len(presence))
+    times = presence.times()
+    order = np.argsort(times, kind='stable')
+    alive = np.cumsum(np.where(order < nb_segments, 1, -1))
+    # Integral of the number of alive segments from the first event to each event
+    integral = np.empty(2 * nb_segments)
+    integral[order] = np.concatenate(([0.], np.cumsum(alive[:-1] * np.diff(times[order]))))
+    per_segment = integral[nb_segments:] - integral[:nb_segments] - presence.durations()
+    return np.bincount(presence.segment_owner(), weights=per_segment, minlength=len(presence))
+
+
+def presence_violations(presence):
+    """
+    Find the segments breaking the invariants of a presence : each segment [b,e] must satisfy b <= e and
+    the segments of an element must be sorted and disjoint (closed intervals, touching segments overlap).
+
+    :param presence: A list of presences or a ``PresenceArray``
+    :return: Two arrays of segments' indexes : unsorted segments (b > e or beginning before the previous one)
+    and segments overlapping the previous segment of their element (in order of beginnings)
+    """
+    presence = to_presence_array(presence)
+    owner = presence.segment_owner()
+    begins, ends = presence.begins, presence.ends
+    same_owner = owner[1:] == owner[:-1]
+    unsorted = begins > ends
+    unsorted[1:] |= same_owner & (begins[1:] < begins[:-1])
+    order = np.lexsort((begins, owner))
+    same_owner = owner[order][1:] == owner[order][:-1]
+    overlap = order[1:][same_owner & (begins[order][1:] <= ends[order][:-1])]
+    return np.flatnonzero(unsorted), np.sort(overlap)
+
+
+def is_columnar(sequence):
+    """
+    Return True if *sequence* is a columnar storage (``PresenceArray``, ``LinkArray``, ``NodeArray`` or
+    ``ValueArray``).
+
+    :param sequence:
+    :return:
+    """
+    return isinstance(sequence, (PresenceArray, LinkArray, NodeArray, ValueArray))
+
+
+def is_view(sequence):
+    """
+    Return True if *sequence* is a lazy view (``ClippedPresence``) over another storage.
+
+    :param sequence:
+    :return:
+    """
+    return isinstance(sequence, ClippedPresence)
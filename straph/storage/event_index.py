@@ -0,0 +1,165 @@
+# Copyright (C) 2017-2021 Léo Rannou - Sorbonne Université/LIP6 - Thales
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+
+from straph.storage.columnar import to_presence_array, to_link_array
+
+# c : code of the event (2: node arrival, 1: link arrival, -1: link departure, -2: node departure)
+# t : time of the event
+# u, v : node (v = -1) or extremities of the link
+# seg : index of the segment (in the node presence or in the link presence) responsible for the event
+EVENT_DTYPE = np.dtype([('c', np.int8),
+                        ('t', np.float64),
+                        ('u', np.int64),
+                        ('v', np.int64),
+                        ('seg', np.int64)])
+
+
+class EventIndex:
+    """
+    Events (nodes and links arrivals and departures) of a stream graph sorted once and for all in a structured array.
+
+    Events are sorted by (t,-c) with a stable sort, links events before nodes events and segments in storage order,
+    which is exactly the order of ``StreamGraph.ordered_events``.
+    """
+
+    def __init__(self, nodes, node_presence, links, link_presence):
+        """
+        A basic constructor for an ``EventIndex`` object
+
+        :param nodes: A list of nodes
+        :param node_presence: A list of presences or a ``PresenceArray``
+        :param links: A list of links or a ``LinkArray``
+        :param link_presence: A list of presences or a ``PresenceArray``
+        """
+        self.node_presence = to_presence_array(node_presence)
+        self.link_presence = to_presence_array(link_presence)
+        self.links = to_link_array(links)
+        nodes = np.asarray(nodes, dtype=np.int64)
+
+        nb_l, nb_n = self.link_presence.nb_segments(), self.node_presence.nb_segments()
+        events = np.empty(2 * (nb_l + nb_n), dtype=EVENT_DTYPE)
+        l_events, n_events = events[:2 * nb_l], events[2 * nb_l:]
+
+        l_owner = self.link_presence.segment_owner()
+        l_events['c'][0::2], l_events['c'][1::2] = 1, -1
+        l_events['t'][0::2], l_events['t'][1::2] = self.link_presence.begins, self.link_presence.ends
+        l_events['u'][0::2] = l_events['u'][1::2] = self.links.u[l_owner]
+        l_events['v'][0::2] = l_events['v'][1::2] = self.links.v[l_owner]
+        l_events['seg'] = np.repeat(np.arange(nb_l), 2)
+
+        n_owner = self.node_presence.segment_owner()
+        n_events['c'][0::2], n_events['c'][1::2] = 2, -2
+        n_events['t'][0::2], n_events['t'][1::2] = self.node_presence.begins, self.node_presence.ends
+        n_events['u'][0::2] = n_events['u'][1::2] = nodes[n_owner]
+        n_events['v'] = -1
+        n_events['seg'] = np.repeat(np.arange(nb_n), 2)
+
+        # np.lexsort is stable : ties keep the links/nodes, storage order
+        self.events = events[np.lexsort((-events['c'], events['t']))]
+        self._endpoint_segments = None
+
+    def __len__(self):
+        return len(self.events)
+
+    def __repr__(self):
+        return "EventIndex(" + str(len(self)) + " events)"
+
+    @property
+    def nbytes(self):
+        return self.events.nbytes
+
+    def select(self, nodes=True, links=True, departures=True):
+        """
+        Sorted events of the chosen kinds (the order is kept).
+
+        :param nodes: Keep nodes events
+        :param links: Keep links events
+        :param departures: Keep departures
+        :return: A structured array of events
+        """
+        c = self.events['c']
+        mask = np.ones(len(c), dtype=bool)
+        if not nodes:
+            mask &= np.abs(c) != 2
+        if not links:
+            mask &= np.abs(c) != 1
+        if not departures:
+            mask &= c > 0
+        if mask.all():
+            return self.events
+        return self.events[mask]
+
+    def ends(self, events):
+        """
+        Ending time of the segment responsible for each event.
+
+        :param events: A structured array of events (from this index)
+        :return: An array (float64)
+        """
+        ends = np.empty(len(events))
+        is_link = np.abs(events['c']) == 1
+        ends[is_link] = self.link_presence.ends[events['seg'][is_link]]
+        ends[~is_link] = self.node_presence.ends[events['seg'][~is_link]]
+        return ends
+
+    def endpoint_segments(self):
+        """
+        For each link segment, the segments of the extremities' presence which contain it (-1 if there is none).
+
+        :return: Two arrays (int64) of node segments' indexes
+        """
+        if self._endpoint_segments is None:
+            owner = self.link_presence.segment_owner()
+            b, e = self.link_presence.begins, self.link_presence.ends
+            self._endpoint_segments = (self.node_presence.locate(self.links.u[owner], b, e),
+                                       self.node_presence.locate(self.links.v[owner], b, e))
+        return self._endpoint_segments
+
+
+def batch_boundaries(events):
+    """
+    Boundaries of the batches of *events* (consecutive events with the same time and the same code).
+
+    :param events: A structured array of sorted events
+    :return: An array of size (number of batches + 1), the i-th batch is events[bounds[i]:bounds[i+1]]
+    """
+    if len(events) == 0:
+        return np.zeros(1, dtype=np.int64)
+    t, c = events['t'], events['c']
+    change = np.flatnonzero((t[1:] != t[:-1]) | (c[1:] != c[:-1])) + 1
+    return np.concatenate(([0], change, [len(events)])).astype(np.int64)
+
+
+def iter_batches(events):
+    """
+    Group an iterable of sorted events' tuples (c,t,...) into batches (consecutive events with the same time and
+    the same code), without materializing the events.
+
+    :param events: An iterable of sorted events, e.g. ``StreamGraph.iter_events()``
+    :return: A generator of lists of events
+    """
+    batch = []
+    t_old, c_old = None, None
+    for e in events:
+        c, t = e[0], e[1]
+        if t != t_old or c != c_old:
+            if batch:
+                yield batch
+            batch = []
+            t_old, c_old = t, c
+        batch.append(e)
+    if batch:
+        yield batch
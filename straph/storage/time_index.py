@@ -0,0 +1,214 @@
+# Copyright (C) 2017-2021 Léo Rannou - Sorbonne Université/LIP6 - Thales
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+
+from straph.storage.columnar import to_presence_array
+
+LEAF_SIZE = 64
+
+
+class IntervalTree:
+    """
+    Static centered interval tree over closed segments [begins[i],ends[i]].
+
+    Each node stores the segments containing its center, sorted by beginning and by ending, so that a stabbing query
+    (segments alive at t) or an overlap query (segments intersecting [a,b]) costs O(log N + k).
+    Small subtrees are stored as leaves and scanned with ``numpy``.
+    """
+
+    def __init__(self, begins, ends):
+        """
+        A basic constructor for an ``IntervalTree`` object
+
+        :param begins: Array of segments' beginnings
+        :param ends: Array of segments' endings
+        """
+        self.begins = np.asarray(begins, dtype=np.float64)
+        self.ends = np.asarray(ends, dtype=np.float64)
+        self._sorted_begins = np.sort(self.begins)
+        self._sorted_ends = np.sort(self.ends)
+        # Nodes are stored in flat lists : center, segments sorted by beginning (with their beginnings),
+        # segments sorted by ending (with their endings), left child, right child (-1 if none).
+        # A leaf has a center of None and stores its segments in the "by beginning" arrays.
+        self._center = []
+        self._by_begin = []
+        self._begin_keys = []
+        self._by_end = []
+        self._end_keys = []
+        self._left = []
+        self._right = []
+        self._root = self._build(np.arange(len(self.begins))) if len(self.begins) else -1
+
+    def __len__(self):
+        return len(self.begins)
+
+    def __repr__(self):
+        return "IntervalTree(" + str(len(self)) + " segments)"
+
+    def _new_node(self, center, by_begin, by_end=None):
+        self._center.append(center)
+        self._by_begin.append(by_begin)
+        self._begin_keys.append(self.begins[by_begin])
+        self._by_end.append(by_end)
+        self._end_keys.append(self.ends[by_end] if by_end is not None else None)
+        self._left.append(-1)
+        self._right.append(-1)
+        return len(self._center) - 1
+
+    def _build(self, segments):
+        # Iterative construction (a stack of (segments, parent, side)) to avoid deep recursions
+        root = -1
+        stack = [(segments, -1, 0)]
+        while stack:
+            segments, parent, side = stack.pop()
+            b, e = self.begins[segments], self.ends[segments]
+            if len(segments) <= LEAF_SIZE:
+                node = self._new_node(None, segments)
+            else:
+                center = np.median(np.concatenate((b, e)))
+                is_left, is_right = e < center, b > center
+                mid = segments[~(is_left | is_right)]
+                node = self._new_node(center,
+                                      mid[np.argsort(self.begins[mid], kind='stable')],
+                                      mid[np.argsort(self.ends[mid], kind='stable')])
+                if is_left.any():
+                    stack.append((segments[is_left], node, -1))
+                if is_right.any():
+                    stack.append((segments[is_right], node, 1))
+            if parent == -1:
+                root = node
+            elif side == -1:
+                self._left[parent] = node
+            else:
+                self._right[parent] = node
+        return root
+
+    def stab(self, t):
+        """
+        Segments alive at instant *t* (b <= t <= e).
+
+        :param t: An instant
+        :return: An array of segments' indexes (unordered)
+        """
+        return self.overlap(t, t)
+
+    def overlap(self, a, b):
+        """
+        Segments intersecting the interval [a,b] (begin <= b and end >= a).
+
+        :param a: Beginning of the interval
+        :param b: Ending of the interval
+        :return: An array of segments' indexes (unordered)
+        """
+        found = []
+        stack = [self._root] if self._root != -1 else []
+        while stack:
+            node = stack.pop()
+            center = self._center[node]
+            if center is None:
+                seg = self._by_begin[node]
+                found.append(seg[(self._begin_keys[node] <= b) & (self.ends[seg] >= a)])
+                continue
+            if b < center:
+                # Segments of this node contain center > b : keep those beginning before b
+                found.append(self._by_begin[node][:np.searchsorted(self._begin_keys[node], b, side='right')])
+                if self._left[node] != -1:
+                    stack.append(self._left[node])
+            elif a > center:
+                # Segments of this node contain center < a : keep those ending after a
+                found.append(self._by_end[node][np.searchsorted(self._end_keys[node], a, side='left'):])
+                if self._right[node] != -1:
+                    stack.append(self._right[node])
+            else:
+                found.append(self._by_begin[node])
+                if self._left[node] != -1:
+                    stack.append(self._left[node])
+                if self._right[node] != -1:
+                    stack.append(self._right[node])
+        if not found:
+            return np.zeros(0, dtype=np.int64)
+        return np.concatenate(found)
+
+    def count(self, t):
+        """
+        Number of segments alive at instant(s) *t*, in O(log N) with sorted endpoints.
+
+        :param t: An instant or an array of instants
+        :return: An integer or an array of integers
+        """
+        return (np.searchsorted(self._sorted_begins, t, side='right') -
+                np.searchsorted(self._sorted_ends, t, side='left'))
+
+
+class TimeIndex:
+    """
+    Interval trees over nodes and links segments of a stream graph.
+    """
+
+    def __init__(self, node_presence, link_presence):
+        """
+        A basic constructor for a ``TimeIndex`` object
+
+        :param node_presence: A list of presences or a ``PresenceArray``
+        :param link_presence: A list of presences or a ``PresenceArray``
+        """
+        self.node_presence = to_presence_array(node_presence)
+        self.link_presence = to_presence_array(link_presence)
+        self.node_tree = IntervalTree(self.node_presence.begins, self.node_presence.ends)
+        self.link_tree = IntervalTree(self.link_presence.begins, self.link_presence.ends)
+        self.node_owner = self.node_presence.segment_owner()
+        self.link_owner = self.link_presence.segment_owner()
+
+    def __repr__(self):
+        return "TimeIndex(" + str(len(self.node_tree)) + " nodes segments, " + \
+               str(len(self.link_tree)) + " links segments)"
+
+    def nodes_at(self, t):
+        """
+        Positions of nodes (in storage order) present at instant *t*, once per segment alive at *t*.
+
+        :param t: An instant
+        :return: A sorted array of positions
+        """
+        return self.node_owner[np.sort(self.node_tree.stab(t))]
+
+    def links_at(self, t):
+        """
+        Positions of links (in storage order) present at instant *t*, once per segment alive at *t*.
+
+        :param t: An instant
+        :return: A sorted array of positions
+        """
+        return self.link_owner[np.sort(self.link_tree.stab(t))]
+
+    def nodes_overlapping(self, a, b):
+        """
+        Positions of nodes present at some instant of [a,b], once per segment intersecting [a,b].
+
+        :param a: Beginning of the interval
+        :param b: Ending of the interval
+        :return: A sorted array of positions
+        """
+        return self.node_owner[np.sort(self.node_tree.overlap(a, b))]
+
+    def links_overlapping(self, a, b):
+        """
+        Positions of links present at some instant of [a,b], once per segment intersecting [a,b].
+
+        :param a: Beginning of the interval
+        :param b: Ending of the interval
+        :return: A sorted array of positions
+        """
+        return self.link_owner[np.sort(self.link_tree.overlap(a, b))]
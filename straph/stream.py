@@ -17,6 +17,7 @@
 
 import csv
 import datetime as dt
+import heapq
 import itertools
 import json
 import math
@@ -36,8 +37,9 @@ from sortedcollections import SortedSet
 
 from straph import components as cmp
 from straph import etf
+from straph import storage
 from straph.paths import paths as ap
-from straph.utils import get_cmap
+from straph.utils import compression_extension, get_cmap, open_file, timestamps_to_datetimes
 
 
 def DFS_iterative(v, Neighborhood):
@@ -255,8 +257,7 @@ def clusters_to_signals(S, dict_clusters, datetime=False, withnan=True):
 
     for n in nodes_to_time_to_value:
         if datetime:
-            dates = [dt.datetime.fromtimestamp(ts) for ts in nodes_to_time_to_value[n]]
-            Index = pd.to_datetime(dates)
+            Index = timestamps_to_datetimes(list(nodes_to_time_to_value[n]))
         else:
             Index = nodes_to_time_to_value[n]
         node_to_series[n] = pd.Series(list(nodes_to_time_to_value[n].values()), index=Index)
@@ -266,8 +267,59 @@ def clusters_to_signals(S, dict_clusters, datetime=False, withnan=True):
     return node_to_series
 
 
+def _read_sg_file(path, nb_labels, chunk_size=1 << 24):
+    """
+    Parse a file in the .sg format by chunks of lines : each line is made of *nb_labels* labels followed by times.
+    Lines without times are ignored.
+
+    :param path: Path of the file
+    :param nb_labels: Number of labels at the beginning of each line
+    :param chunk_size: Approximate size (in bytes) of a chunk
+    :return: A list of labels' lists and a list of times' lists
+    """
+    labels = []
+    times = []
+    with open_file(path, 'r') as file_input:
+        while True:
+            lines = file_input.readlines(chunk_size)
+            if not lines:
+                break
+            for line in lines:
+                line = line.split()
+                if len(line) > nb_labels:
+                    labels.append(line[:nb_labels])
+                    times.append(list(map(float, line[nb_labels:])))
+    return labels, times
+
+
+def _time_formatter(precision=None):
+    # Shortest representation of times or a fixed number of decimals
+    if precision is None:
+        return str
+    return ('%.' + str(int(precision)) + 'f').__mod__
+
+
+def _write_sg_file(path, keys, presences, precision=None, block_size=1 << 16):
+    """
+    Write a file in the .sg format : each line is made of *keys[i]* followed by the times of *presences[i]*.
+    Lines are formatted and written by blocks of *block_size* lines.
+
+    :param path: Path of the file (possibly compressed, see ``open_file``)
+    :param keys: A list of strings (labels of each line)
+    :param presences: A list of presences or a ``PresenceArray``, in the same order as *keys*
+    :param precision: Number of decimals of times (default: shortest representation of each time)
+    :param block_size: Number of lines formatted and written at once
+    :return:
+    """
+    fmt = _time_formatter(precision)
+    with open_file(path, 'w') as file_output:
+        for i in range(0, len(keys), block_size):
+            file_output.write("".join([" ".join([k] + list(map(fmt, p))) + " \n"
+                                       for k, p in zip(keys[i:i + block_size], presences[i:i + block_size])]))
+
+
 def read_stream_graph(path_links, path_nodes=None, node_label=True,
-                      path_weights=None, path_trips=None
+                      path_weights=None, path_trips=None, columnar=False
                       ):
     """
     tb : time of arrival (b: begin)
@@ -281,82 +333,79 @@ def read_stream_graph(path_links, path_nodes=None, node_label=True,
     id_node1 id_node2 tb_0 te_0 tb_1 te_1 ... tb_l1 te_l1
     id_node3 id_node4 tb_0 te_0 tb_1 te_1 ... tb_l2 te_l2
     ...
+    Weights and trips files have the same format as the link file (one line per link, in the same order).
+    Files may be compressed (gzip, bz2, xz or zstd), the compression is detected from their extension.
 
     :param path_trips:
     :param path_weights:
     :param node_label:
     :param path_links: path to store nodes and their time of presence
     :param path_nodes: path to store links and their time of presence
+    :param columnar: Return presences and links in a columnar storage (see ``StreamGraph.to_columnar``)
     :return: 
     """
     nodes = []
     node_presence = []
-    links = []
-    link_presence = []
     id_to_label, label_to_id = None, None
     if node_label:
         id_to_label = {}
-        label_to_id = defaultdict(lambda: len(label_to_id))
+        label_to_id = {}
 
     if path_nodes is not None:
-        with open(path_nodes, 'r') as file_input:
-            for line in file_input:
-                line = line.strip().split(" ")
-                if len(line) > 1:
-                    if node_label:
-                        n_label = str(line[0])
-                        n = label_to_id[n_label]
-                        id_to_label[n] = n_label
-                    else:
-                        n = int(line[0])
+        node_labels, node_presence = _read_sg_file(path_nodes, 1)
+        for n_label, in node_labels:
+            if node_label:
+                if n_label not in label_to_id:
+                    label_to_id[n_label] = len(label_to_id)
+                n = label_to_id[n_label]
+                id_to_label[n] = n_label
+            else:
+                n = int(n_label)
+            nodes.append(n)
+
+    link_labels, link_presence = _read_sg_file(path_links, 2)
+    links = []
+    kept = []
+    node_set = set(nodes)
+    for i, (u, v) in enumerate(link_labels):
+        if node_label:
+            if path_nodes is not None and (u not in label_to_id or v not in label_to_id):
+                #  Probably an empty node...
+                continue
+            for n_label in (u, v):
+                if n_label not in label_to_id:
+                    label_to_id[n_label] = len(label_to_id)
+                    id_to_label[label_to_id[n_label]] = n_label
+            u, v = label_to_id[u], label_to_id[v]
+        else:
+            u, v = int(u), int(v)
+        kept.append(i)
+        links.append((u, v))
+        if path_nodes is None:
+            for n in (u, v):
+                if n not in node_set:
+                    node_set.add(n)
                     nodes.append(n)
-                    np = [float(t) for t in line[1:]]
-                    node_presence.append(np)
-    with open(path_links, 'r') as file_input:
-        for line in file_input:
-            line = line.strip().split(" ")
-            if len(line) > 2:
-                if node_label:
-                    u_label = str(line[0])
-                    v_label = str(line[1])
-                    if u_label not in label_to_id or v_label not in label_to_id:
-                        #  Probably an empty node...
-                        continue
-                    # assert u_label in label_to_id
-                    # assert v_label in label_to_id
-                    u = label_to_id[u_label]
-                    v = label_to_id[v_label]
-                else:
-                    u = int(line[0])
-                    v = int(line[1])
-                links.append((u, v))
-                if path_nodes is None:
-                    if u not in nodes:
-                        nodes.append(u)
-                    if v not in nodes:
-                        nodes.append(v)
-                lp = [float(t) for t in line[2:]]
-                link_presence.append(lp)
-
-    weights = []
+    all_kept = len(kept) == len(link_labels)
+    if not all_kept:
+        link_presence = [link_presence[i] for i in kept]
+
+    # Weights and trips are aligned with the links' lines
+    weights, trips = None, None
     if path_weights:
-        with open(path_weights, 'r') as file_input:
-            for line in file_input:
-                line = line.strip().split(" ")
-                if len(line) > 2:
-                    w = [float(t) for t in line[2:]]
-                    weights.append(w)
-    trips = []
+        _, weights = _read_sg_file(path_weights, 2)
+        weights = weights if all_kept else [weights[i] for i in kept if i < len(weights)]
     if path_trips:
-        with open(path_trips, 'r') as file_input:
-            for line in file_input:
-                line = line.strip().split(" ")
-                if len(line) > 2:
-                    tp = [float(t) for t in line[2:]]
-                    trips.append(tp)
-
-    S = StreamGraph(times=[min([t for n in node_presence for t in n]),
-                           max([t for n in node_presence for t in n])],
+        _, trips = _read_sg_file(path_trips, 2)
+        trips = trips if all_kept else [trips[i] for i in kept if i < len(trips)]
+
+    if columnar:
+        node_presence = storage.to_presence_array(node_presence)
+        link_presence = storage.to_presence_array(link_presence)
+        links = storage.to_link_array(links)
+
+    presence_times = storage.to_presence_array(node_presence if len(node_presence) else link_presence).times()
+    S = StreamGraph(times=[presence_times.min().item(), presence_times.max().item()],
                     nodes=nodes,
                     node_presence=node_presence,
                     links=links,
@@ -367,6 +416,20 @@ def read_stream_graph(path_links, path_nodes=None, node_label=True,
     return S
 
 
+def load_binary(path, mmap=True):
+    """
+    Load a stream graph saved with ``StreamGraph.save_binary``.
+    Nodes, presences, links, weights and trips are loaded in a columnar storage and labels and ids tables as
+    ``LabelTable`` (entries are decoded on access). With *mmap* the arrays are memory-mapped (read-only) : data is
+    paged in on demand. The stream graph is converted to lists (and dictionaries) if it is modified.
+
+    :param path: Path of the binary file
+    :param mmap: Memory-map the arrays instead of reading them
+    :return: A ``StreamGraph``
+    """
+    return StreamGraph(**storage.read_binary(path, mmap=mmap))
+
+
 def sum_presence(np):
     return sum([t1 - t0 for t0, t1 in zip(np[::2], np[1::2])])
 
@@ -422,7 +485,7 @@ def read_stream_graph_from_json(path_nodes, path_links):
     nodes_to_id = {}
     id_to_node = {}
     nodes_to_label = {}
-    with open(path_nodes, 'r') as file_input:
+    with open_file(path_nodes, 'r') as file_input:
         nodes_json = json.load(file_input)
         for js in nodes_json["nodes"]:
             n_id = int(js["id"])
@@ -449,7 +512,7 @@ def read_stream_graph_from_json(path_nodes, path_links):
             node_presence.append(np)
         times = nodes_json["timeExtent"]
 
-    with open(path_links, 'r') as file_input:
+    with open_file(path_links, 'r') as file_input:
         links_json = json.load(file_input)
         for js in links_json["links"]:
             u_id, v_id = int(js['node1']), int(js['node2'])
@@ -496,7 +559,11 @@ class StreamGraph:
         succescively the time of apparition and time of disparition of the node.
         :param links : A list of links present in the stream graph
         :param link_presence : same as node_presence
+        Presences and links can also be given in a columnar storage (``PresenceArray`` and ``LinkArray``
+        from ``straph.storage``).
         """
+        self._cache = {}
+        self._lookup = {}
         self.id = id
         self.times = times
         self.nodes = nodes
@@ -507,48 +574,275 @@ class StreamGraph:
         self.link_presence = link_presence
         self.weights = weights
         self.trips = trips
+        self._parent = None
+
+    # Nodes, labels, links and their presences are properties : reassigning one of them invalidates the cached indexes.
+
+    @property
+    def nodes(self):
+        return self._nodes
+
+    @nodes.setter
+    def nodes(self, nodes):
+        self._nodes = nodes
+        self._invalidate(lookups=True)
+
+    @property
+    def node_to_label(self):
+        return self._node_to_label
+
+    @node_to_label.setter
+    def node_to_label(self, node_to_label):
+        self._node_to_label = node_to_label
+        self._lookup.pop('label_to_node', None)
+
+    @property
+    def node_presence(self):
+        return self._node_presence
+
+    @node_presence.setter
+    def node_presence(self, node_presence):
+        self._node_presence = node_presence
+        self._invalidate()
 
-    def check_integrity(self):
+    @property
+    def links(self):
+        return self._links
+
+    @links.setter
+    def links(self, links):
+        self._links = links
+        self._invalidate(lookups=True)
+
+    @property
+    def link_presence(self):
+        return self._link_presence
+
+    @link_presence.setter
+    def link_presence(self, link_presence):
+        self._link_presence = link_presence
+        self._invalidate()
+
+    def _invalidate(self, lookups=False):
+        self._cache.clear()
+        if lookups:
+            self._lookup.clear()
+
+    def get_label_to_node(self):
         """
-        Check node presence and link presence for overlapping time windows
-        Check that a link presence include both node presence
+        Return the dictionary label -> node. It is built once and maintained by ``add_node`` and ``add_link``,
+        it must not be modified.
 
-        :return: True if the structure is coherent or an error with the problematic link/node.
+        :return: A dictionary
         """
-        # Easily optimisable, suffit de comparer les éléments de liste pairwise puis de double check if TRUE
-        for n, np in zip(self.links, self.link_presence):
-            assert list(sorted(np)) == np
-            for t0, t1 in zip(np[::2], np[1::2]):
-                for t2, t3 in zip(np[::2], np[1::2]):
-                    if (t0, t1) != (t2, t3):
-                        if t0 <= t3 and t2 <= t1:
-                            raise ValueError("Integrity compromised on node : "
-                                             + str(n) +
-                                             ". Check node presence (probably overlapping intervals) !\n")
+        if 'label_to_node' not in self._lookup:
+            self._lookup['label_to_node'] = {v: k for k, v in self.node_to_label.items()}
+        return self._lookup['label_to_node']
 
-        for l, lp in zip(self.links, self.link_presence):
-            assert list(sorted(lp)) == lp
-            id1 = self.nodes.index(l[0])
-            id2 = self.nodes.index(l[1])
-            for lt0, lt1 in zip(lp[::2], lp[1::2]):
-                check_1 = False
-                check_2 = False
-                for nt0, nt1 in zip(self.node_presence[id1][::2],
-                                    self.node_presence[id1][1::2]):
-                    if nt0 <= lt0 and nt1 >= lt1:
-                        check_1 = True
-                        continue
-                for nt0, nt1 in zip(self.node_presence[id2][::2],
-                                    self.node_presence[id2][1::2]):
-                    if nt0 <= lt0 and nt1 >= lt1:
-                        check_2 = True
-                        continue
-                if not check_1 or not check_2:
-                    raise ValueError("Integrity compromised on link : "
-                                     + str(l) + " at time :" + str((lt0, lt1)) +
-                                     ". Check node presence !\n" + "Node " + str(l[0]) +
-                                     " presence:" + str(self.node_presence[l[0]]) + "\nNode " + str(l[1]) +
-                                     " presence:" + str(self.node_presence[l[1]]))
+    def _get_link_to_index(self):
+        if 'link_to_index' not in self._lookup:
+            link_to_index = {}
+            for i, l in enumerate(self.links):
+                link_to_index.setdefault(l, i)
+            self._lookup['link_to_index'] = link_to_index
+        return self._lookup['link_to_index']
+
+    def _get_node_set(self):
+        if 'node_set' not in self._lookup:
+            self._lookup['node_set'] = set(self.nodes)
+        return self._lookup['node_set']
+
+    def get_link_index(self, l):
+        """
+        Return the position of the link *l* (u,v) in ``self.links``, None if it isn't present.
+
+        :param l: A link (u,v)
+        :return: An integer or None
+        """
+        return self._get_link_to_index().get(l)
+
+    #####################################
+    #       Columnar Storage            #
+    #####################################
+
+    def to_columnar(self):
+        """
+        Convert (inplace) nodes presence, links and links presence to a columnar storage :
+        contiguous ``numpy`` arrays instead of lists of lists (see ``straph.storage``).
+
+        :return: The ``StreamGraph`` itself
+        """
+        self.node_presence = storage.to_presence_array(self.node_presence)
+        self.links = storage.to_link_array(self.links)
+        self.link_presence = storage.to_presence_array(self.link_presence)
+        return self
+
+    def to_lists(self):
+        """
+        Convert (inplace) a columnar storage or a lazy view back to lists of lists
+        (and tables loaded from a binary file back to dictionaries).
+
+        :return: The ``StreamGraph`` itself
+        """
+        if storage.is_columnar(self.nodes):
+            self.nodes = self.nodes.to_lists()
+        if isinstance(self.node_to_label, storage.LabelTable):
+            self.node_to_label = self.node_to_label.to_dict()
+        if isinstance(self.node_to_id, storage.LabelTable):
+            self.node_to_id = self.node_to_id.to_dict()
+        if storage.is_columnar(self.weights):
+            self.weights = self.weights.to_lists()
+        if storage.is_columnar(self.trips):
+            self.trips = self.trips.to_lists()
+        if storage.is_columnar(self.node_presence) or storage.is_view(self.node_presence):
+            self.node_presence = self.node_presence.to_lists()
+        if storage.is_columnar(self.links):
+            self.links = self.links.to_lists()
+        if storage.is_columnar(self.link_presence) or storage.is_view(self.link_presence):
+            self.link_presence = self.link_presence.to_lists()
+        return self
+
+    def is_columnar(self):
+        """
+        Return True if the ``StreamGraph`` presences are stored in a columnar storage.
+
+        :return:
+        """
+        return storage.is_columnar(self.node_presence) or storage.is_columnar(self.link_presence)
+
+    def _materialize(self):
+        # Inplace modifications require lists and invalidate the cached indexes
+        if self._parent is not None:
+            # A window shares nodes, links and labels with its parent : copy them before any modification
+            self.nodes = list(self.nodes)
+            self.links = list(self.links)
+            if self.node_to_label is not None:
+                self.node_to_label = dict(self.node_to_label)
+            if self.node_to_id is not None:
+                self.node_to_id = dict(self.node_to_id)
+            self._parent = None
+        self.to_lists()
+        self._invalidate()
+
+    def window(self, a, b):
+        """
+        Return a lazy view of the stream graph restricted to the time window [a,b].
+        The view shares nodes, links and labels with the current stream graph and clips presences on access
+        (with a binary search), nothing is copied until the view is modified.
+        As ``filter_by_time_window`` every node and link is kept, possibly with an empty presence.
+        On a view, [a,b] is intersected with the window of the view (an empty window if they are disjoint).
+
+        :param a: Beginning of the time window
+        :param b: Ending of the time window
+        :return: A ``StreamGraph``
+        """
+        times = [a, b]
+        if storage.is_view(self.node_presence):
+            times = [max(a, self.node_presence.a), min(b, self.node_presence.b)]
+            times[1] = max(times)
+        W = StreamGraph(id=self.id,
+                        times=times,
+                        nodes=self.nodes,
+                        node_to_label=self.node_to_label,
+                        node_to_id=self.node_to_id,
+                        node_presence=storage.ClippedPresence(self.node_presence, a, b),
+                        links=self.links,
+                        link_presence=storage.ClippedPresence(self.link_presence, a, b))
+        W._parent = self
+        return W
+
+    def coarsen(self, delta):
+        """
+        Return an approximation of the stream graph with fewer distinct event times, preserving its connectivity
+        properties : event times are discretized greedily (the first one, then each event time at least *delta*
+        after the previously kept one) and each segment [b,e] is shrunk to [first kept time >= b,
+        last kept time <= e]. Every segment must last at least *delta*.
+
+        :param delta: Minimal gap between two event times
+        :return: A ``StreamGraph`` (with the same storage as the current one)
+        """
+        node_presence, link_presence = storage.coarsen_presences([self.node_presence, self.link_presence], delta)
+        links = self.links
+        if not self.is_columnar():
+            node_presence, link_presence = node_presence.to_lists(), link_presence.to_lists()
+            links = list(links)
+        return StreamGraph(id=self.id,
+                           times=self.times,
+                           nodes=list(self.nodes),
+                           node_to_label=dict(self.node_to_label) if self.node_to_label is not None else None,
+                           node_to_id=dict(self.node_to_id) if self.node_to_id is not None else None,
+                           node_presence=node_presence,
+                           links=links,
+                           link_presence=link_presence,
+                           weights=self.weights,
+                           trips=self.trips)
+
+    def check_integrity(self, report=False):
+        """
+        Check node presence and link presence for unsorted or overlapping time windows,
+        check that links' extremities are nodes of the stream graph and that a link presence is included in
+        both extremities' presence.
+
+        :param report: If True, return every violation instead of raising an error at the first one.
+        :return: True if the structure is coherent or an error with the problematic link/node.
+        If *report* is True, a list of violations (empty if the structure is coherent), each violation is a
+        dictionary {'type': 'unsorted', 'overlap', 'unknown_node' or 'not_covered',
+        'element': 'node' or 'link', 'id': the node or the link, 'segment': (t0,t1)}.
+        """
+        node_presence = storage.to_presence_array(self.node_presence)
+        link_presence = storage.to_presence_array(self.link_presence)
+        links = storage.to_link_array(self.links)
+        violations = []
+
+        def add_violations(type, element, ids, presence, segments):
+            for i, t0, t1 in zip(presence.segment_owner()[segments].tolist(),
+                                 presence.begins[segments].tolist(), presence.ends[segments].tolist()):
+                violations.append({'type': type, 'element': element, 'id': ids[i], 'segment': (t0, t1)})
+
+        for element, ids, presence in (('node', self.nodes, node_presence), ('link', links, link_presence)):
+            unsorted, overlap = storage.presence_violations(presence)
+            add_violations('unsorted', element, ids, presence, unsorted)
+            add_violations('overlap', element, ids, presence, overlap)
+
+        # Position of links' extremities in self.nodes
+        nodes = numpy.asarray(self.nodes, dtype=numpy.int64)
+        order = numpy.argsort(nodes, kind='stable')
+        sorted_nodes = nodes[order]
+        seg_owner = link_presence.segment_owner()
+        positions = []
+        known = numpy.ones(len(seg_owner), dtype=bool)
+        for extremity in (links.u[seg_owner], links.v[seg_owner]):
+            pos = numpy.searchsorted(sorted_nodes, extremity)
+            found = pos < len(sorted_nodes)
+            found[found] = sorted_nodes[pos[found]] == extremity[found]
+            position = numpy.full(len(extremity), -1, dtype=numpy.int64)
+            position[found] = order[pos[found]]
+            known &= found
+            positions.append(position)
+        add_violations('unknown_node', 'link', links, link_presence, numpy.flatnonzero(~known))
+
+        covered = known.copy()
+        for pos in positions:
+            covered &= node_presence.locate(pos, link_presence.begins, link_presence.ends) >= 0
+        add_violations('not_covered', 'link', links, link_presence, numpy.flatnonzero(known & ~covered))
+
+        if report:
+            return violations
+        if violations:
+            v = violations[0]
+            if v['type'] == 'unknown_node':
+                raise ValueError("Integrity compromised on link : " + str(v['id']) +
+                                 ". An extremity isn't a node of the stream graph !\n")
+            if v['type'] == 'not_covered':
+                u, w = v['id']
+                raise ValueError("Integrity compromised on link : "
+                                 + str(v['id']) + " at time :" + str(v['segment']) +
+                                 ". Check node presence !\n" + "Node " + str(u) +
+                                 " presence:" + str(self.node_presence[u]) + "\nNode " + str(w) +
+                                 " presence:" + str(self.node_presence[w]))
+            raise ValueError("Integrity compromised on " + v['element'] + " : " + str(v['id']) +
+                             " at time :" + str(v['segment']) +
+                             ". Check " + v['element'] + " presence (" + v['type'] + " intervals) !\n")
         print("Integrity check ok !")
         return True
 
@@ -561,8 +855,12 @@ class StreamGraph:
         :param node_presence: Presence times of the added node [b,e,b',e',...]
         :return: The id corresponding to the added node
         """
+        self._materialize()
+        return self._add_node(node, node_presence)
+
+    def _add_node(self, node, node_presence):
         if self.node_to_label is not None:
-            label_to_node = {v: k for k, v in self.node_to_label.items()}
+            label_to_node = self.get_label_to_node()
             if node in label_to_node:
                 new_node = label_to_node[node]
                 assert self.node_presence[new_node][-1] < node_presence[0]
@@ -570,6 +868,7 @@ class StreamGraph:
             else:
                 new_node = len(self.nodes)
                 self.node_to_label[new_node] = node
+                label_to_node[node] = new_node
                 self.nodes.append(new_node)
                 self.node_presence.append(node_presence)
         else:
@@ -581,11 +880,19 @@ class StreamGraph:
                 new_node = len(self.nodes)
                 self.nodes.append(new_node)
                 self.node_presence.append(node_presence)
+        self._get_node_set().add(new_node)
         return new_node
 
     def add_nodes(self, nodes_list, node_presence_list):
-        for n, np in zip(nodes_list, node_presence_list):
-            self.add_node(n, np)
+        """
+        Add several nodes to the stream graph (see ``add_node``).
+
+        :param nodes_list: A list of nodes' labels
+        :param node_presence_list: A list of presence times, in the same order as *nodes_list*
+        :return: The list of ids corresponding to the added nodes
+        """
+        self._materialize()
+        return [self._add_node(n, np) for n, np in zip(nodes_list, node_presence_list)]
 
     def add_link(self, link, link_presence):
         """
@@ -596,41 +903,56 @@ class StreamGraph:
         :param link_presence: Presence times of the added link [b,e,b',e',...]
         :return:
         """
+        self._materialize()
+        self._add_link(link, link_presence)
+
+    def _add_link(self, link, link_presence):
         u, v = link
         if self.node_to_label is not None:
-            label_to_node = {v: k for k, v in self.node_to_label.items()}
+            label_to_node = self.get_label_to_node()
             if u in label_to_node:
                 new_u = label_to_node[u]
             else:
-                new_u = self.add_node(u, link_presence)
+                new_u = self._add_node(u, link_presence)
             if v in label_to_node:
                 new_v = label_to_node[v]
             else:
-                new_v = self.add_node(v, link_presence)
+                new_v = self._add_node(v, link_presence)
         else:
-            if u in self.nodes:
+            node_set = self._get_node_set()
+            if u in node_set:
                 new_u = u
             else:
-                new_u = self.add_node(u, link_presence)
-            if v in self.nodes:
+                new_u = self._add_node(u, link_presence)
+            if v in node_set:
                 new_v = v
             else:
-                new_v = self.add_node(v, link_presence)
-
-        if (new_u, new_v) in self.links:
-            assert self.link_presence[self.links.index((new_u, new_v))][-1] < link_presence[0]
-            self.link_presence[self.links.index((new_u, new_v))] += link_presence
-        elif (new_v, new_u) in self.links:
-            assert self.link_presence[self.links.index((new_v, new_u))][-1] < link_presence[0]
-            self.link_presence[self.links.index((new_v, new_u))] += link_presence
+                new_v = self._add_node(v, link_presence)
+
+        link_to_index = self._get_link_to_index()
+        id_link = link_to_index.get((new_u, new_v))
+        if id_link is None:
+            id_link = link_to_index.get((new_v, new_u))
+        if id_link is not None:
+            assert self.link_presence[id_link][-1] < link_presence[0]
+            self.link_presence[id_link] += link_presence
         else:
             new_link = (new_u, new_v)
+            link_to_index[new_link] = len(self.links)
             self.links.append(new_link)
             self.link_presence.append(link_presence)
 
     def add_links(self, links_list, link_presence_list):
+        """
+        Add several links to the stream graph (see ``add_link``).
+
+        :param links_list: A list of links (A,B) where 'A' and 'B' are the nodes' labels
+        :param link_presence_list: A list of presence times, in the same order as *links_list*
+        :return:
+        """
+        self._materialize()
         for l, lp in zip(links_list, link_presence_list):
-            self.add_link(l, lp)
+            self._add_link(l, lp)
 
     #####################################
     #       Events Representation       #
@@ -643,14 +965,12 @@ class StreamGraph:
         :param all:
         :return:
         """
+        event_times = numpy.concatenate((storage.to_presence_array(self.node_presence).times(),
+                                         storage.to_presence_array(self.link_presence).times()))
         if all:
-            event_times = sorted([t for np in self.node_presence for t in np] +
-                                 [t for lp in self.link_presence for t in lp])
-            return event_times
+            return numpy.sort(event_times).tolist()
         else:
-            event_t_nodes = set([t for np in self.node_presence for t in np])
-            event_t_links = set([t for lp in self.link_presence for t in lp])
-            return event_t_links | event_t_nodes
+            return set(numpy.unique(event_times).tolist())
 
     def number_of_event_times(self):
         """
@@ -660,6 +980,98 @@ class StreamGraph:
         """
         return len(self.event_times())
 
+    def event_index(self):
+        """
+        Return the sorted index of events (see ``straph.storage.EventIndex``). The index is computed once and cached
+        until the stream graph is modified (through its methods or by reassigning nodes, links or their presences).
+        Inplace modifications of the underlying lists made outside of ``StreamGraph`` methods are not tracked.
+
+        :return: An ``EventIndex``
+        """
+        if 'event_index' not in self._cache:
+            self._cache['event_index'] = storage.EventIndex(self.nodes, self.node_presence,
+                                                            self.links, self.link_presence)
+        return self._cache['event_index']
+
+    def time_index(self):
+        """
+        Return the time index of nodes and links segments (see ``straph.storage.TimeIndex``), used to answer
+        instant and interval queries in O(log N + k). It is cached like ``event_index``.
+
+        :return: A ``TimeIndex``
+        """
+        if 'time_index' not in self._cache:
+            self._cache['time_index'] = storage.TimeIndex(self.node_presence, self.link_presence)
+        return self._cache['time_index']
+
+    def _segment_values(self, values, default):
+        # Flatten per link values (weights or trips) to be aligned with links segments
+        if not values:
+            return default
+        if storage.is_columnar(values):
+            values = values.values.tolist()
+        else:
+            values = list(itertools.chain.from_iterable(values))
+        flat = numpy.empty(len(values), dtype=object)
+        flat[:] = values
+        return flat
+
+    def _event_tuples(self, events, extras=(), augmented=False):
+        """
+        Convert sorted events from the event index to the usual tuples :
+        (2,t0,t1,n), (-2,t1,n), (1,t0,t1,u,v,*extras), (-1,t1,u,v,*extras)
+
+        :param events: A structured array of events from ``self.event_index()``
+        :param extras: Values added to links tuples, either a constant or an array aligned with links segments
+        :param augmented: If True links extremities are replaced by their maximal segmented nodes (t0,t1,u)
+        and links whose extremities aren't present are dropped.
+        :return: A list of tuples
+        """
+        index = self.event_index()
+        if augmented:
+            seg_u, seg_v = index.endpoint_segments()
+            seg_u, seg_v = seg_u[events['seg']], seg_v[events['seg']]
+            keep = (seg_u >= 0) & (seg_v >= 0)
+            events, seg_u, seg_v = events[keep], seg_u[keep], seg_v[keep]
+            nodes_b, nodes_e = index.node_presence.begins, index.node_presence.ends
+            u = list(zip(nodes_b[seg_u].tolist(), nodes_e[seg_u].tolist(), events['u'].tolist()))
+            v = list(zip(nodes_b[seg_v].tolist(), nodes_e[seg_v].tolist(), events['v'].tolist()))
+        else:
+            u, v = events['u'].tolist(), events['v'].tolist()
+        c, t, e = events['c'].tolist(), events['t'].tolist(), index.ends(events).tolist()
+
+        if extras:
+            is_link = numpy.abs(events['c']) == 1
+            columns = []
+            for x in extras:
+                if isinstance(x, numpy.ndarray):
+                    col = numpy.full(len(events), None, dtype=object)
+                    col[is_link] = x[events['seg'][is_link]]
+                    columns.append(col.tolist())
+                else:
+                    columns.append(itertools.repeat(x))
+            extras = zip(*columns)
+        else:
+            extras = itertools.repeat(())
+
+        tuples = []
+        append = tuples.append
+        for ci, ti, ei, ui, vi, xi in zip(c, t, e, u, v, extras):
+            if ci == 1:
+                append((1, ti, ei, ui, vi) + xi)  # code each link, 1 for a beginning, -1 for an ending
+            elif ci == -1:
+                append((-1, ti, ui, vi) + xi)
+            elif ci == 2:
+                append((2, ti, ei, ui))  # code a node arrival with a 2
+            else:
+                append((-2, ti, ui))  # code a node departure with a -2
+        return tuples
+
+    def _batch_tuples(self, events):
+        tuples = self._event_tuples(events)
+        bounds = storage.batch_boundaries(events).tolist()
+        return [tuples[b0:b1] for b0, b1 in zip(bounds[:-1], bounds[1:])]
+
     def ordered_events(self, weights_or_trips=False):
         """
         Return an ordered of all the events (nodes and links arrivals or departure) occuring in the stream graph.
@@ -667,47 +1079,70 @@ class StreamGraph:
         :param weights_or_trips:
         :return:
         """
-        links = []
+        events = self.event_index().events
         if weights_or_trips:
-            if self.weights and self.trips:
-                for l, lp, we, tr in zip(self.links, self.link_presence, self.weights, self.trips):
-                    for t0, t1, w, d in zip(lp[::2], lp[1::2], we, tr):
-                        u, v = l
-                        links.append((1, t0, t1, u, v, w, d))  # code each link, 1 for a beginning, -1 for an ending
-                        links.append((-1, t1, u, v, w, d))
-
-            elif self.weights:
-                for l, lp, we in zip(self.links, self.link_presence, self.weights):
-                    for t0, t1, w in zip(lp[::2], lp[1::2], we):
-                        u, v = l
-                        links.append((1, t0, t1, u, v, w, 0))  # code each link, 1 for a beginning, -1 for an ending
-                        links.append((-1, t1, u, v, w, 0))
-
-            elif self.trips:
-                for l, lp, tr in zip(self.links, self.link_presence, self.trips):
-                    for t0, t1, d in zip(lp[::2], lp[1::2], tr):
-                        u, v = l
-                        links.append((1, t0, t1, u, v, 1, d))  # code each link, 1 for a beginning, -1 for an ending
-                        links.append((-1, t1, u, v, 1, d))
+            return self._event_tuples(events, extras=(self._segment_values(self.weights, 1),
+                                                      self._segment_values(self.trips, 0)))
+        return self._event_tuples(events)
+
+    def iter_events(self, nodes=True, links=True, departures=True):
+        """
+        Generate the events of the stream graph in the same order (and format) as ``ordered_events`` without
+        sorting them : since each presence is already sorted, events are produced by a k-way merge (with a heap) of
+        the presences. Memory is bounded by the number of nodes and links instead of the number of events.
+
+        :param nodes: Generate nodes events
+        :param links: Generate links events
+        :param departures: Generate departures
+        :return: A generator of events
+        """
+        # Accessors to the i-th segment of an element, without converting a columnar storage to lists
+        def accessors(presence):
+            if storage.is_columnar(presence):
+                offsets = presence.offsets.tolist()
+                begins, ends = presence.begins, presence.ends
+                return (lambda idx: offsets[idx + 1] - offsets[idx],
+                        lambda idx, pos: begins[offsets[idx] + pos].item(),
+                        lambda idx, pos: ends[offsets[idx] + pos].item())
+            return (lambda idx: len(presence[idx]) // 2,
+                    lambda idx, pos: presence[idx][2 * pos],
+                    lambda idx, pos: presence[idx][2 * pos + 1])
+
+        # Heap items : (t, -c, kind (links before nodes), element index, segment position)
+        kinds = []
+        if links:
+            kinds.append((1, self.link_presence))
+        if nodes:
+            kinds.append((2, self.node_presence))
+        heap = []
+        segment_access = {}
+        for c, presence in kinds:
+            size, begin, end = accessors(presence)
+            segment_access[c] = (size, begin, end)
+            kind = 0 if c == 1 else 1
+            for idx in range(len(presence)):
+                if size(idx):
+                    heap.append((begin(idx, 0), -c, kind, idx, 0))
+                    if departures:
+                        heap.append((end(idx, 0), c, kind, idx, 0))
+        heapq.heapify(heap)
+
+        while heap:
+            t, minus_c, kind, idx, pos = heap[0]
+            c = abs(minus_c)
+            size, begin, end = segment_access[c]
+            if c == 1:
+                u, v = self.links[idx]
+                event = (1, t, end(idx, pos), u, v) if minus_c < 0 else (-1, t, u, v)
             else:
-                for l, lp in zip(self.links, self.link_presence):
-                    for t0, t1 in zip(lp[::2], lp[1::2]):
-                        u, v = l
-                        links.append((1, t0, t1, u, v, 1, 0))  # code each link, 1 for a beginning, -1 for an ending
-                        links.append((-1, t1, u, v, 1, 0))
-        else:
-            for l, lp in zip(self.links, self.link_presence):
-                for t0, t1 in zip(lp[::2], lp[1::2]):
-                    u, v = l
-                    links.append((1, t0, t1, u, v))  # code each link, 1 for a beginning, -1 for an ending
-                    links.append((-1, t1, u, v))
-        nodes = []
-        for n, np in zip(self.nodes, self.node_presence):
-            for t0, t1 in zip(np[::2], np[1::2]):
-                nodes.append((2, t0, t1, n))  # code a node arrival with a 2
-                nodes.append((-2, t1, n))  # code a node departure with a -2
-        events = sorted(links + nodes, key=lambda x: (x[1], -x[0]))
-        return events
+                n = self.nodes[idx]
+                event = (2, t, end(idx, pos), n) if minus_c < 0 else (-2, t, n)
+            if pos + 1 < size(idx):
+                t_next = begin(idx, pos + 1) if minus_c < 0 else end(idx, pos + 1)
+                heapq.heapreplace(heap, (t_next, minus_c, kind, idx, pos + 1))
+            else:
+                heapq.heappop(heap)
+            yield event
 
     def ordered_batch_events(self):
         """
@@ -716,25 +1151,7 @@ class StreamGraph:
 
         :return:
         """
-
-        batchs = []
-        E = self.ordered_events()
-        t_old = E[0][1]
-        c_old = E[0][0]
-        current_batch = []
-        for e in E:
-            c, t = e[0], e[1]
-            if t == t_old and c == c_old:
-                current_batch.append(e)
-            else:
-                batchs.append(current_batch)
-                current_batch = [e]
-                t_old = t
-                c_old = c
-
-        if current_batch:
-            batchs.append(current_batch)
-        return batchs
+        return self._batch_tuples(self.event_index().events)
 
     #######################################
     #       Arrivals Events               #
@@ -746,26 +1163,12 @@ class StreamGraph:
 
         :return:
         """
-
-        nodes = []
-        for n, np in zip(self.nodes, self.node_presence):
-            for t0, t1 in zip(np[::2], np[1::2]):
-                nodes.append((2, t0, t1, n))  #  code a node arrival with a 2
+        events = self._event_tuples(self.event_index().select(departures=False))
         if free_memory:
             self.nodes = []
             self.node_presence = []
-
-        links = []
-        for l, lp in zip(self.links, self.link_presence):
-            for t0, t1 in zip(lp[::2], lp[1::2]):
-                u, v = l
-                links.append((1, t0, t1, u, v))  # code each link, 1 for a beginning, -1 for an ending
-
-        if free_memory:
             self.links = []
             self.link_presence = []
-
-        events = sorted(links + nodes, key=lambda x: (x[1], -x[0]))
         return events
 
     #####################################
@@ -778,125 +1181,37 @@ class StreamGraph:
 
         :return:
         """
-        links = []
+        events = self.event_index().select(nodes=False)
         if weights_or_trips:
-            if self.weights and self.trips:
-                for l, lp, we, tr in zip(self.links, self.link_presence, self.weights, self.trips):
-                    for t0, t1, w, d in zip(lp[::2], lp[1::2], we, tr):
-                        nu, nv = self.get_according_node_presence_from_link(l, t0, t1)
-                        if nu and nv:
-                            links.append(
-                                (1, t0, t1, nu, nv, w, d))  # code each link, 1 for a beginning, -1 for an ending
-                            links.append((-1, t1, nu, nv, w, d))
-
-            elif self.weights:
-                for l, lp, we in zip(self.links, self.link_presence, self.weights):
-                    for t0, t1, w in zip(lp[::2], lp[1::2], we):
-                        nu, nv = self.get_according_node_presence_from_link(l, t0, t1)
-                        if nu and nv:
-                            links.append(
-                                (1, t0, t1, nu, nv, w, 0))  # code each link, 1 for a beginning, -1 for an ending
-                            links.append((-1, t1, nu, nv, w, 0))
-
-            elif self.trips:
-                for l, lp, tr in zip(self.links, self.link_presence, self.trips):
-                    for t0, t1, d in zip(lp[::2], lp[1::2], tr):
-                        nu, nv = self.get_according_node_presence_from_link(l, t0, t1)
-                        if nu and nv:
-                            links.append(
-                                (1, t0, t1, nu, nv, 1, d))  # code each link, 1 for a beginning, -1 for an ending
-                            links.append((-1, t1, nu, nv, 1, d))
-            else:
-                for l, lp in zip(self.links, self.link_presence):
-                    for t0, t1 in zip(lp[::2], lp[1::2]):
-                        nu, nv = self.get_according_node_presence_from_link(l, t0, t1)
-                        if nu and nv:
-                            links.append(
-                                (1, t0, t1, nu, nv, 1, 0))  # code each link, 1 for a beginning, -1 for an ending
-                            links.append((-1, t1, nu, nv, 1, 0))
-        else:
-            for l, lp in zip(self.links, self.link_presence):
-                for t0, t1 in zip(lp[::2], lp[1::2]):
-                    nu, nv = self.get_according_node_presence_from_link(l, t0, t1)
-                    if nu and nv:
-                        links.append((1, t0, t1, nu, nv))  # code each link, 1 for a beginning, -1 for an ending
-                        links.append((-1, t1, nu, nv))
-        links = sorted(links, key=lambda x: (x[1], -x[0]))
-        return links
+            return self._event_tuples(events, extras=(self._segment_values(self.weights, 1),
+                                                      self._segment_values(self.trips, 0)), augmented=True)
+        return self._event_tuples(events, augmented=True)
 
     def ordered_batch_links(self, free_memory=False):
-        links = []
-        batchs = []
-        for l, lp in zip(self.links, self.link_presence):
-            u, v = l
-            for t0, t1 in zip(lp[::2], lp[1::2]):
-                links.append((1, t0, t1, u, v))  # code each link, 1 for a beginning, -1 for an ending
-                links.append((-1, t1, u, v))
+        batchs = self._batch_tuples(self.event_index().select(nodes=False))
         if free_memory:
             self.nodes = []
             self.node_presence = []
             self.links = []
             self.link_presence = []
-
-        links = sorted(links, key=lambda x: (x[1], -x[0]))
-        t_old = links[0][1]
-        c_old = links[0][0]
-        current_batch = []
-        for e in links:
-            c, t = e[0], e[1]
-            if t == t_old and c == c_old:
-                current_batch.append(e)
-            else:
-                batchs.append(current_batch)
-                current_batch = [e]
-                t_old = t
-                c_old = c
-        if current_batch:
-            batchs.append(current_batch)
         return batchs
 
     def ordered_links(self):
         """
         :return:
         """
-        links = []
-        if self.weights and self.trips:
-            for l, lp, we, tr in zip(self.links, self.link_presence, self.weights, self.trips):
-                u, v = l
-                for t0, t1, w, d in zip(lp[::2], lp[1::2], we, tr):
-                    links.append((1, t0, t1, u, v, w, d))  # code each link, 1 for a beginning, -1 for an ending
-                    links.append((-1, t1, u, v, w, d))
-            links = sorted(links, key=lambda x: (x[1], -x[0]))
-
-        elif self.weights:
-            for l, lp, we in zip(self.links, self.link_presence, self.weights):
-                u, v = l
-                for t0, t1, w in zip(lp[::2], lp[1::2], we):
-                    links.append((1, t0, t1, u, v, w))  # code each link, 1 for a beginning, -1 for an ending
-                    links.append((-1, t1, u, v, w))
-            links = sorted(links, key=lambda x: (x[1], -x[0]))
-
-        elif self.trips:
-            for l, lp, tr in zip(self.links, self.link_presence, self.trips):
-                u, v = l
-                for t0, t1, d in zip(lp[::2], lp[1::2], tr):
-                    links.append((1, t0, t1, u, v, d))  # code each link, 1 for a beginning, -1 for an ending
-                    links.append((-1, t1, u, v, d))
-            links = sorted(links, key=lambda x: (x[1], -x[0]))
-        else:
-            for l, lp in zip(self.links, self.link_presence):
-                u, v = l
-                for t0, t1 in zip(lp[::2], lp[1::2]):
-                    links.append((1, t0, t1, u, v))  # code each link, 1 for a beginning, -1 for an ending
-                    links.append((-1, t1, u, v))
-            links = sorted(links, key=lambda x: (x[1], -x[0]))
-        return links
+        extras = []
+        if self.weights:
+            extras.append(self._segment_values(self.weights, 1))
+        if self.trips:
+            extras.append(self._segment_values(self.trips, 0))
+        return self._event_tuples(self.event_index().select(nodes=False), extras=extras)
 
     ####################################################################
     #               WRITERS                                            #
     ####################################################################
 
-    def write_to_sg(self, output_file):
+    def write_to_sg(self, output_file, compression=None, precision=None, parallel=False):
         """
         tb : time of arrival (b: begin)
         te : time of departure (e: end)
@@ -911,40 +1226,53 @@ class StreamGraph:
         ...
 
         :param output_file: path to store nodes, links and their time of presence
+        :param compression: None, 'gzip', 'bz2', 'xz' or 'zstd' (the extension of the compression is appended to
+        the names of the files)
+        :param precision: Number of decimals of times (default: shortest representation of each time)
+        :param parallel: Write the nodes file and the links file concurrently (in two processes)
         :return:
         """
+        extension = compression_extension(compression)
         if self.node_to_label:
-            with open(output_file + '_nodes.sg', 'w') as file_output:
-                for n, np in zip(self.nodes, self.node_presence):
-                    file_output.write(str(self.node_to_label[n]) + " ")
-                    for t in np:
-                        file_output.write(str(t) + " ")
-                    file_output.write("\n")
-            with open(output_file + '_links.sg', 'w') as file_output:
-                for l, lp in zip(self.links, self.link_presence):
-                    file_output.write(str(self.node_to_label[l[0]]) + " " + str(self.node_to_label[l[1]]) + " ")
-                    for t in lp:
-                        file_output.write(str(t) + " ")
-                    file_output.write("\n")
+            node_keys = [str(self.node_to_label[n]) for n in self.nodes]
+            link_keys = [str(self.node_to_label[u]) + " " + str(self.node_to_label[v]) for u, v in self.links]
         else:
-            with open(output_file + '_nodes.sg', 'w') as file_output:
-                for n, np in zip(self.nodes, self.node_presence):
-                    file_output.write(str(n) + " ")
-                    for t in np:
-                        file_output.write(str(t) + " ")
-                    file_output.write("\n")
-            with open(output_file + '_links.sg', 'w') as file_output:
-                for l, lp in zip(self.links, self.link_presence):
-                    file_output.write(str(l[0]) + " " + str(l[1]) + " ")
-                    for t in lp:
-                        file_output.write(str(t) + " ")
-                    file_output.write("\n")
-
-    def write_to_csv(self, output_name):
+            node_keys = [str(n) for n in self.nodes]
+            link_keys = [str(u) + " " + str(v) for u, v in self.links]
+        files = [(output_file + '_nodes.sg' + extension, node_keys, self.node_presence),
+                 (output_file + '_links.sg' + extension, link_keys, self.link_presence)]
+        if parallel:
+            # Formatting times is CPU bound : each file is written by its own process
+            Parallel(n_jobs=2)(delayed(_write_sg_file)(path, keys, presences, precision)
+                               for path, keys, presences in files)
+        else:
+            for path, keys, presences in files:
+                _write_sg_file(path, keys, presences, precision)
+
+    def save_binary(self, output_file):
+        """
+        Save the stream graph in a binary format : a header, contiguous arrays of offsets and times and the labels
+        table (see ``straph.storage.binary``). Load it with ``load_binary``.
+
+        :param output_file: Path of the binary file
+        :return:
+        """
+        storage.write_binary(output_file,
+                             self.nodes, self.node_presence, self.links, self.link_presence,
+                             times=self.times,
+                             id=self.id,
+                             node_to_label=self.node_to_label,
+                             node_to_id=self.node_to_id,
+                             weights=self.weights,
+                             trips=self.trips)
+
+    def write_to_csv(self, output_name, precision=None):
         """
         Write the stream graph to CSV format(node1;node2;start_time;duration).
+        The file is compressed if *output_name* ends with the extension of a compression (.gz, .bz2, .xz, .zst).
 
         :param output_name:
+        :param precision: Number of decimals of times (default: shortest representation of each time)
         :return:
         """
         links = []
@@ -957,13 +1285,23 @@ class StreamGraph:
             for l, lp in zip(self.links, self.link_presence):
                 for t0, t1 in zip(lp[::2], lp[1::2]):
                     links.append((t0, t1 - t0, l[0], l[1],))
-        links = sorted(links, key=lambda x: (x[0], x[1]))
-        with open(output_name, 'w', newline='') as file_output:
-            stream_writer = csv.writer(file_output, delimiter=';')
-            for l in links:
-                stream_writer.writerow(l)
+        links.sort(key=lambda x: (x[0], x[1]))
+        if precision is not None:
+            fmt = _time_formatter(precision)
+            links = [(fmt(t), fmt(d), u, v) for t, d, u, v in links]
+        with open_file(output_name, 'w', newline='') as file_output:
+            csv.writer(file_output, delimiter=';').writerows(links)
 
-    def write_to_lsf(self, output_name):
+    def write_to_lsf(self, output_name, compression=None, precision=None, block_size=1 << 16):
+        """
+        Write the stream graph to the .lsf format (an interaction 'b e u v' per line).
+
+        :param output_name: Name of the file (without the extension '.lsf')
+        :param compression: None, 'gzip', 'bz2', 'xz' or 'zstd'
+        :param precision: Number of decimals of times (default: shortest representation of each time)
+        :param block_size: Number of lines formatted and written at once
+        :return:
+        """
         links = []
         if self.node_to_label:
             for l, lp in zip(self.links, self.link_presence):
@@ -974,29 +1312,31 @@ class StreamGraph:
             for l, lp in zip(self.links, self.link_presence):
                 for t0, t1 in zip(lp[::2], lp[1::2]):
                     links.append((t0, t1, l[0], l[1]))
-        links = sorted(links, key=lambda x: (x[2], x[3]))
-        links = [str(l[0]) + " " + str(l[1]) + " " + str(l[2]) + " " + str(l[3])
-                 for l in links]
-        with open(output_name + ".lsf", 'w', newline='') as otp:
+        links.sort(key=lambda x: (x[2], x[3]))
+        fmt = _time_formatter(precision)
+        with open_file(output_name + ".lsf" + compression_extension(compression), 'w', newline='') as otp:
             otp.write("alpha " + str(self.times[0]) + "\n")
             otp.write("omega " + str(self.times[1]) + "\n")
-            for l in links:
-                otp.write(l + "\n")
+            for i in range(0, len(links), block_size):
+                otp.write("".join([fmt(t0) + " " + fmt(t1) + " " + str(u) + " " + str(v) + "\n"
+                                   for t0, t1, u, v in links[i:i + block_size]]))
 
-    def write_to_json(self, output_name, index_pos=None):
+    def write_to_json(self, output_name, index_pos=None, compression=None):
         """
         Write to a JSON format. For the tool stream-graph-visualisation.
 
         :param output_name: Name prefix of json files. Will be stored under "output_name_node_activity.json"\
         and "output_name_link_presence.json"
         :param index_pos:
+        :param compression: None, 'gzip', 'bz2', 'xz' or 'zstd'
         :return:
         """
+        extension = compression_extension(compression)
         nodes_json = self.node_activity_to_json(index_pos)
         links_json = self.link_presence_to_json()
-        with open(output_name + "_node_activity.json", 'w') as file_output:
+        with open_file(output_name + "_node_activity.json" + extension, 'w') as file_output:
             json.dump(nodes_json, file_output)
-        with open(output_name + "_link_presence.json", 'w') as file_output:
+        with open_file(output_name + "_link_presence.json" + extension, 'w') as file_output:
             json.dump(links_json, file_output)
 
     def node_activity_to_json(self, node_to_position=None, sort_type=None):
@@ -1107,9 +1447,9 @@ class StreamGraph:
         :return: None
         """
         print("Nb of Nodes : ", len(self.nodes))
-        print("Nb of segmented nodes : ", sum([len(item) / 2 for item in self.node_presence]))
+        print("Nb of segmented nodes : ", storage.to_presence_array(self.node_presence).nb_segments())
         print("Nb of links : ", len(self.links))
-        print("Nb of segmented links : ", sum([len(item) / 2 for item in self.link_presence]))
+        print("Nb of segmented links : ", storage.to_presence_array(self.link_presence).nb_segments())
         print("Nb of event times : ", self.number_of_event_times())
 
     ####################################################################
@@ -1227,8 +1567,7 @@ class StreamGraph:
             node_to_series = {}
             for n in node_to_time_to_value:
                 if datetime:
-                    dates = [dt.datetime.fromtimestamp(ts) for ts in node_to_time_to_value[n]]
-                    Index = pd.to_datetime(dates)
+                    Index = timestamps_to_datetimes(list(node_to_time_to_value[n]))
                 else:
                     Index = node_to_time_to_value[n]
                 node_to_series[n] = pd.Series(list(node_to_time_to_value[n].values()), index=Index)
@@ -1496,7 +1835,7 @@ class StreamGraph:
             c_map_cluster = cm.get_cmap(cmap_clusters, len(clusters.keys()))
 
             if type(next(iter(next(iter(clusters.values()))))[2]) is str:
-                label_to_node = {v: k for k, v in self.node_to_label.items()}
+                label_to_node = self.get_label_to_node()
                 clusters = {k: [(t0, t1, label_to_node[n]) for t0, t1, n in clusters[k]] for k in clusters}
 
             list_legend = []
@@ -1547,7 +1886,7 @@ class StreamGraph:
             cmap_clusters = lambda x: cmap_clusters_tmp(x + 2)  # Add an offset to get rid of the first colors
             #
             if type(clusters[0][0][2]) is str:
-                label_to_node = {v: k for k, v in self.node_to_label.items()}
+                label_to_node = self.get_label_to_node()
                 clusters = [[(t0, t1, label_to_node[n]) for t0, t1, n in c] for c in clusters]
             if nodes_list is not None:
                 for c in range(len(clusters)):
@@ -1704,6 +2043,7 @@ class StreamGraph:
         self.plot(ax=ax1)
 
         interactions_times = self.event_times()
+        instant_graphs = dict(self.instant_graphs(interactions_times, to_networkx=True))
         line, = ax1.plot([], [], color='#B6AAC0', lw=8, alpha=0.5)
 
         G_glob = self.aggregated_graph(to_networkx=True)
@@ -1740,7 +2080,7 @@ class StreamGraph:
             line.set_data(x, y)
             # Second Plot
             ax2.clear()
-            G = self.instant_graph(t, to_networkx=True)
+            G = instant_graphs[t]
             node_c = [dict_node_colors[n] for n in G.nodes()]
             nx.draw_networkx_labels(G_glob, pos, font_size=fontsize, ax=ax2, font_family='Garamond',
                                     font_color='k', alpha=1)  # '#666699'
@@ -1772,8 +2112,7 @@ class StreamGraph:
 
         :return:
         """
-        return sum([t1 - t0 for i in self.node_presence
-                    for t0, t1 in zip(i[::2], i[1::2])])
+        return float(storage.to_presence_array(self.node_presence).durations().sum())
 
     def get_card_E(self):
         """
@@ -1781,8 +2120,7 @@ class StreamGraph:
 
         :return:
         """
-        return sum([t1 - t0 for i in self.link_presence
-                    for t0, t1 in zip(i[::2], i[1::2])])
+        return float(storage.to_presence_array(self.link_presence).durations().sum())
 
     def duration(self):
         """
@@ -1798,7 +2136,7 @@ class StreamGraph:
 
         :return:
         """
-        return sum([t1 - t0 for v in self.link_presence for t0, t1 in zip(v[::2], v[1::2])])
+        return self.get_card_E()
 
     def coverage(self):
         """
@@ -1833,55 +2171,80 @@ class StreamGraph:
         nb_links = card_E / T
         return nb_links
 
-    def nodes_over_time(self, to_series=True, datetime=True, events=None, eps=None):
+    def _counters_over_time(self, events, eps, increments):
         """
-        Compute the number of nodes over time in the Stream Graph.
+        Values of counters over time, as in a loop over sorted events : for each time t of a counted event, the values
+        before t (at t - eps), after the arrivals at t (at t, if any) and after the departures at t (at t + eps,
+        if any).
 
-        :param to_series: return a ``pandas`` series
-        :param datetime: A boolean value to display timestamp as readable data
-        :param events:
-        :param eps:
-        :return: A dictionnary linking event time to the corresponding number of nodes
+        :param events: A list of events' tuples (see ``ordered_events``) or None to use the event index
+        :param eps: A small shift of times, by default a thousandth of the shortest non instantaneous segment
+        :param increments: Dictionary event's code -> increments of the counters
+        :return: Times (an array of size K) and values of the counters (an array of size K x number of counters)
         """
-        t_to_nb_nodes = {}
-        cnt_nodes = 0
-        t_last_event = None
         if events is None:
-            events = self.ordered_events()
+            index = self.event_index()
+            c, t = index.events['c'], index.events['t']
+            if eps is None:
+                durations = numpy.concatenate((index.node_presence.durations(), index.link_presence.durations()))
+        else:
+            c = numpy.fromiter((e[0] for e in events), dtype=numpy.int8)
+            t = numpy.fromiter((e[1] for e in events), dtype=numpy.float64)
+            if eps is None:
+                durations = numpy.array([e[2] - e[1] for e in events if e[0] in {1, 2}], dtype=numpy.float64)
         if eps is None:
-            eps = min([e[2] - e[1] for e in events if (e[0] in {1, 2} and e[2] - e[1] != 0)]) * (10 ** -3)
-        for e in events:
-            c = e[0]
-            t = e[1]
-            if c == 2:
-                _, t0, t1, n = e
-
-                if t != t_last_event:
-                    t_to_nb_nodes[t - eps] = cnt_nodes
-                    t_last_event = t
-
-                cnt_nodes += 1
-                t_to_nb_nodes[t] = cnt_nodes
-
-            elif c == -2:
-                _, t1, n = e
-
-                if t != t_last_event:
-                    t_to_nb_nodes[t - eps] = cnt_nodes
-                    t_last_event = t
-
-                cnt_nodes -= 1
-                t_to_nb_nodes[t + eps] = cnt_nodes
+            eps = durations[durations != 0].min() * (10 ** -3)
+
+        # Codes are in [-2,2]
+        table = numpy.zeros((5, len(next(iter(increments.values())))), dtype=numpy.int64)
+        for code, increment in increments.items():
+            table[code + 2] = increment
+        counted = numpy.isin(c, list(increments))
+        c, t = c[counted], t[counted]
+        times, inverse = numpy.unique(t, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        is_arrival = c > 0
+        deltas = table[c + 2]
+        arrivals = numpy.stack([numpy.bincount(inverse[is_arrival], weights=x[is_arrival], minlength=len(times))
+                                for x in deltas.T], axis=1).astype(numpy.int64)
+        departures = numpy.stack([numpy.bincount(inverse[~is_arrival], weights=x[~is_arrival], minlength=len(times))
+                                  for x in deltas.T], axis=1).astype(numpy.int64)
+        after = numpy.cumsum(arrivals + departures, axis=0)
+        before = after - arrivals - departures
+
+        keep = numpy.stack((numpy.ones(len(times), dtype=bool),
+                            numpy.bincount(inverse[is_arrival], minlength=len(times)) > 0,
+                            numpy.bincount(inverse[~is_arrival], minlength=len(times)) > 0), axis=1)
+        points = numpy.stack((times - eps, times, times + eps), axis=1)[keep]
+        values = numpy.stack((before, before + arrivals, after), axis=1)[keep]
+        return points, values
+
+    def _over_time_output(self, times, values, to_series, datetime, to_arrays):
+        if to_arrays:
+            return times, values
         if to_series:
             if datetime:
-                Index = [dt.datetime.fromtimestamp(ts) for ts in t_to_nb_nodes.keys()]
+                Index = timestamps_to_datetimes(times)
             else:
-                Index = list(t_to_nb_nodes.keys())
-            t_to_nb_nodes = pd.Series(list(t_to_nb_nodes.values()), index=Index)
+                Index = times
+            return pd.Series(values, index=Index)
+        return dict(zip(times.tolist(), values.tolist()))
 
-        return t_to_nb_nodes
+    def nodes_over_time(self, to_series=True, datetime=True, events=None, eps=None, to_arrays=False):
+        """
+        Compute the number of nodes over time in the Stream Graph.
+
+        :param to_series: return a ``pandas`` series
+        :param datetime: A boolean value to display timestamp as readable data
+        :param events:
+        :param eps:
+        :param to_arrays: return two ``numpy`` arrays (event times, number of nodes)
+        :return: A dictionnary linking event time to the corresponding number of nodes
+        """
+        times, values = self._counters_over_time(events, eps, {2: [1], -2: [-1]})
+        return self._over_time_output(times, values[:, 0], to_series, datetime, to_arrays)
 
-    def links_over_time(self, to_series=True, datetime=True, events=None, eps=None):
+    def links_over_time(self, to_series=True, datetime=True, events=None, eps=None, to_arrays=False):
         """
         Compute the number of active links over time in the Stream Graph.
 
@@ -1889,46 +2252,11 @@ class StreamGraph:
         :param datetime: A boolean value to display timestamp as readable data
         :param events:
         :param eps:
+        :param to_arrays: return two ``numpy`` arrays (event times, number of links)
         :return: A dictionnary event time to the corresponding number of nodes
         """
-        t_to_nb_links = {}
-        cnt_links = 0
-        t_last_event = None
-        if events is None:
-            events = self.ordered_events()
-        if eps is None:
-            eps = min([e[2] - e[1] for e in events if (e[0] in {1, 2} and e[2] - e[1] != 0)]) * (10 ** -3)
-        for e in events:
-            c = e[0]
-            t = e[1]
-            if c == 1:
-                _, t0, t1, u, v = e
-
-                if t != t_last_event:
-                    t_to_nb_links[t - eps] = cnt_links
-                    t_last_event = t
-
-                cnt_links += 1
-                t_to_nb_links[t] = cnt_links
-
-            elif c == -1:
-                _, t1, u, v = e
-
-                if t != t_last_event:
-                    t_to_nb_links[t - eps] = cnt_links
-                    t_last_event = t
-
-                cnt_links -= 1
-                t_to_nb_links[t + eps] = cnt_links
-
-        if to_series:
-            if datetime:
-                Index = [dt.datetime.fromtimestamp(ts) for ts in t_to_nb_links.keys()]
-            else:
-                Index = list(t_to_nb_links.keys())
-            t_to_nb_links = pd.Series(list(t_to_nb_links.values()), index=Index)
-
-        return t_to_nb_links
+        times, values = self._counters_over_time(events, eps, {1: [1], -1: [-1]})
+        return self._over_time_output(times, values[:, 0], to_series, datetime, to_arrays)
 
     def degree_over_time(self, nodes=None, to_series=True, datetime=True, events=None, eps=None):
         """
@@ -1999,7 +2327,7 @@ class StreamGraph:
 
         if to_series:
             if datetime:
-                Index = [dt.datetime.fromtimestamp(ts) for ts in t_to_node_degree.keys()]
+                Index = timestamps_to_datetimes(list(t_to_node_degree.keys()))
             else:
                 Index = list(t_to_node_degree.keys())
             t_to_node_degree = {v: pd.Series([t_to_node_degree[t][v]
@@ -2009,7 +2337,7 @@ class StreamGraph:
 
         return t_to_node_degree
 
-    def mean_degree_over_time(self, to_series=True, datetime=True, events=None, eps=None):
+    def mean_degree_over_time(self, to_series=True, datetime=True, events=None, eps=None, to_arrays=False):
         """
         Compute the mean degree over time in the Stream Graph.
 
@@ -2017,75 +2345,14 @@ class StreamGraph:
         :param datetime:
         :param events:
         :param eps:
+        :param to_arrays: return two ``numpy`` arrays (event times, mean degree)
         :return: A dictionnary event time to the corresponding number of nodes
         """
-        t_to_mean_degree = {}
-        cnt_nodes = 0
-        cnt_global_degree = 0
-        t_last_event = None
-        if events is None:
-            events = self.ordered_events()
-        if eps is None:
-            eps = min([e[2] - e[1] for e in events if (e[0] in {1, 2} and e[2] - e[1] != 0)]) * (10 ** -3)
-        for e in events:
-            c = e[0]
-            t = e[1]
-            if c == 1:
-                _, t0, t1, u, v = e
-
-                if t != t_last_event:
-                    t_to_mean_degree[t - eps] = cnt_global_degree / cnt_nodes
-                    t_last_event = t
-
-                cnt_global_degree += 2
-                t_to_mean_degree[t] = cnt_global_degree / cnt_nodes
-            elif c == -1:
-                _, t1, u, v = e
-
-                if t != t_last_event:
-                    t_to_mean_degree[t - eps] = cnt_global_degree / cnt_nodes
-                    t_last_event = t
-
-                cnt_global_degree -= 2
-                t_to_mean_degree[t + eps] = cnt_global_degree / cnt_nodes
-
-            elif c == 2:
-                _, t0, t1, n = e
-
-                if t != t_last_event:
-                    if cnt_nodes > 0:
-                        t_to_mean_degree[t - eps] = cnt_global_degree / cnt_nodes
-                    else:
-                        t_to_mean_degree[t - eps] = 0
-                    t_last_event = t
-
-                cnt_nodes += 1
-                if cnt_nodes > 0:
-                    t_to_mean_degree[t] = cnt_global_degree / cnt_nodes
-                else:
-                    t_to_mean_degree[t] = 0
-
-            elif c == -2:
-                _, t1, n = e
-
-                if t != t_last_event:
-                    t_to_mean_degree[t - eps] = cnt_global_degree / cnt_nodes
-                    t_last_event = t
-
-                cnt_nodes -= 1
-                if cnt_nodes > 0:
-                    t_to_mean_degree[t + eps] = cnt_global_degree / cnt_nodes
-                else:
-                    t_to_mean_degree[t + eps] = 0
-
-        if to_series:
-            if datetime:
-                Index = [dt.datetime.fromtimestamp(ts) for ts in t_to_mean_degree.keys()]
-            else:
-                Index = list(t_to_mean_degree.keys())
-            t_to_mean_degree = pd.Series(list(t_to_mean_degree.values()), index=Index)
-
-        return t_to_mean_degree
+        # Counters : number of nodes, sum of degrees
+        times, values = self._counters_over_time(events, eps, {2: [1, 0], -2: [-1, 0], 1: [0, 2], -1: [0, -2]})
+        nb_nodes, sum_degrees = values[:, 0], values[:, 1]
+        mean_degree = numpy.divide(sum_degrees, nb_nodes, out=numpy.zeros(len(times)), where=nb_nodes > 0)
+        return self._over_time_output(times, mean_degree, to_series, datetime, to_arrays)
 
     def node_weight_at_t(self, t):
         """
@@ -2095,7 +2362,7 @@ class StreamGraph:
         :return:
         """
         V = len(self.nodes)
-        Vt = sum([1 for i in self.node_presence for ta, tb in zip(i[::2], i[1::2]) if ta <= t <= tb])
+        Vt = int(self.time_index().node_tree.count(t))
         return Vt / V
 
     def link_weight_at_t(self, t):
@@ -2107,7 +2374,7 @@ class StreamGraph:
         """
         l = len(self.nodes)
         E = (l * (l - 1)) / 2
-        Et = sum([1 for i in self.link_presence for ta, tb in zip(i[::2], i[1::2]) if ta <= t <= tb])
+        Et = int(self.time_index().link_tree.count(t))
         return Et / E
 
     def plot_link_weight(self):
@@ -2141,8 +2408,7 @@ class StreamGraph:
         :return:
         """
         V = len(self.nodes)
-        Vt = [sum([1 for i in self.node_presence for ta, tb in zip(i[::2], i[1::2]) if ta <= t <= tb]) / V
-              for t in I]
+        Vt = (self.time_index().node_tree.count(numpy.asarray(I, dtype=float)) / V).tolist()
         return Vt
 
     def link_weight_on_I(self, I):
@@ -2154,8 +2420,7 @@ class StreamGraph:
         """
         l = len(self.nodes)
         E = (l * (l - 1)) / 2
-        Et = [sum([1 for i in self.link_presence for ta, tb in zip(i[::2], i[1::2]) if ta <= t <= tb]) / E
-              for t in I]
+        Et = (self.time_index().link_tree.count(numpy.asarray(I, dtype=float)) / E).tolist()
         return Et
 
     def plot_node_weight(self):
@@ -2204,27 +2469,34 @@ class StreamGraph:
         return card_E / possible_pairs
 
     def _get_sum_intersection(self):
-        l = len(self.nodes)
-        sum_node_intersection = sum([min(a1, b1) - max(a0, b0)
-                                     for i1 in range(l)
-                                     for i2 in range(i1 + 1, l)
-                                     for a0, a1 in zip(self.node_presence[i1][::2], self.node_presence[i1][1::2])
-                                     for b0, b1 in zip(self.node_presence[i2][::2], self.node_presence[i2][1::2])
-                                     if (a0 <= b1 and b0 <= a1)
-                                     ])
-        return sum_node_intersection
+        """
+        Sum, over pairs of distinct nodes, of the durations of their co-presence : with a sweep over sorted nodes'
+        events, it is the integral over time of C(alive,2), alive being the number of nodes present.
+
+        :return: A float
+        """
+        presence = storage.to_presence_array(self.node_presence)
+        nb_segments = presence.nb_segments()
+        if nb_segments == 0:
+            return 0
+        times = presence.times()
+        order = numpy.argsort(times, kind='stable')
+        times = times[order]
+        # Segments of a node are disjoint : alive segments belong to distinct nodes
+        alive = numpy.cumsum(numpy.where(order < nb_segments, 1, -1))[:-1].astype(numpy.float64)
+        return float(numpy.dot(alive * (alive - 1) / 2, numpy.diff(times)))
 
     def _get_sum_union(self):
-        l = len(self.nodes)
-        sum_node_union = sum([max(a1, b1) - min(a0, b0)
-                              if (a0 <= b1 and b0 <= a1)
-                              else (b1 - b0) + (a1 - a0)
-                              for i1 in range(l)
-                              for i2 in range(i1 + 1, l)
-                              for a0, a1 in zip(self.node_presence[i1][::2], self.node_presence[i1][1::2])
-                              for b0, b1 in zip(self.node_presence[i2][::2], self.node_presence[i2][1::2])
-                              ])
-        return sum_node_union
+        """
+        Sum, over pairs of distinct nodes and pairs of their segments, of the durations of the union of both segments
+        (the sum of their durations minus their intersection).
+
+        :return: A float
+        """
+        presence = storage.to_presence_array(self.node_presence)
+        durations = numpy.bincount(presence.segment_owner(), weights=presence.durations(), minlength=len(presence))
+        counts = presence.segment_counts()
+        return float(numpy.dot(durations, presence.nb_segments() - counts)) - self._get_sum_intersection()
 
     def uniformity(self):
         """
@@ -2248,49 +2520,52 @@ class StreamGraph:
         sum_node_intersection = self._get_sum_intersection()
         return card_E / sum_node_intersection
 
-    def link_densities(self):
-        """
-        Return the link densities of a ``StreamGraph`` object
-
-        :return: The link's densities, each link is associated to a float
-        """
-        densities = Counter()
-        for l, lp in zip(self.links, self.link_presence):
-            n1 = l[0]
-            n2 = l[1]
-            Tuv = sum([t1 - t0 for t0, t1 in zip(lp[::2], lp[1::2])])
-            # Pour que ça marche il faut que les noeuds soient représentés par leurs indices dans la liste
-            intersection_Tu_Tv = sum([min(a1, b1) - max(a0, b0)
-                                      for a0, a1 in zip(self.node_presence[n1][::2], self.node_presence[n1][1::2])
-                                      for b0, b1 in zip(self.node_presence[n2][::2], self.node_presence[n2][1::2])
-                                      if (a0 <= b1 and b0 <= a1)
-                                      ])
-            densities[l] = Tuv / intersection_Tu_Tv
-        return densities
+    def _node_positions(self, nodes):
+        # Positions in ``self.nodes`` of an array of nodes
+        index = {n: i for i, n in enumerate(self.nodes)}
+        return numpy.fromiter(map(index.__getitem__, numpy.asarray(nodes).tolist()), dtype=numpy.int64,
+                              count=len(nodes))
 
-    def node_densities(self):
+    def link_densities(self, to_series=False):
         """
-        Return the node densities of a ``StreamGraph`` object
+        Return the link densities of a ``StreamGraph`` object : the duration of each link (u,v) divided by the
+        duration of the co-presence of u and v (nan or inf if u and v are never present together).
 
-        :return:
+        :param to_series: Return a ``pandas.Series`` indexed by links
+        :return: The link's densities, each link is associated to a float
         """
-        densities = Counter()
-        for n, np in zip(self.nodes, self.node_presence):
-            sum_links = sum([t1 - t0
-                             for l, lp in zip(self.links, self.link_presence)
-                             if (l[0] == n or l[1] == n)
-                             for t0, t1 in zip(lp[::2], lp[1::2])
-                             ])
-
-            sum_node_intersection = sum([min(a1, b1) - max(a0, b0)
-                                         for n2, np2 in zip(self.nodes, self.node_presence)
-                                         if (n2 != n)
-                                         for a0, a1 in zip(np[::2], np[1::2])
-                                         for b0, b1 in zip(np2[::2], np2[1::2])
-                                         if (a0 <= b1 and b0 <= a1)
-                                         ])
-            densities[n] = sum_links / sum_node_intersection
-        return densities
+        links = storage.to_link_array(self.links)
+        link_presence = storage.to_presence_array(self.link_presence)
+        durations = numpy.bincount(link_presence.segment_owner(), weights=link_presence.durations(),
+                                   minlength=len(links))
+        intersections = storage.pairwise_overlaps(self.node_presence,
+                                                  self._node_positions(links.u), self._node_positions(links.v))
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            densities = durations / intersections
+        if to_series:
+            return pd.Series(densities, index=pd.MultiIndex.from_arrays([links.u, links.v]))
+        return Counter(dict(zip(self.links, densities.tolist())))
+
+    def node_densities(self, to_series=False):
+        """
+        Return the node densities of a ``StreamGraph`` object : the duration of the links of each node divided by
+        the duration of its co-presence with the other nodes (nan or inf if it is never present with another node).
+
+        :param to_series: Return a ``pandas.Series`` indexed by nodes
+        :return: The node's densities, each node is associated to a float
+        """
+        links = storage.to_link_array(self.links)
+        link_presence = storage.to_presence_array(self.link_presence)
+        durations = numpy.bincount(link_presence.segment_owner(), weights=link_presence.durations(),
+                                   minlength=len(links))
+        # Scatter-add durations of links into their extremities
+        sum_links = numpy.bincount(numpy.concatenate((self._node_positions(links.u), self._node_positions(links.v))),
+                                   weights=numpy.tile(durations, 2), minlength=len(self.nodes))
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            densities = sum_links / storage.copresence_durations(self.node_presence)
+        if to_series:
+            return pd.Series(densities, index=self.nodes)
+        return Counter(dict(zip(self.nodes, densities.tolist())))
 
     def neighborhood(self):
         """
@@ -2408,98 +2683,158 @@ class StreamGraph:
         card_E = self.get_card_E()
         return 2 * card_E / card_W
 
-    def clustering_coefficient(self):
+    def clustering_coefficient(self, nodes=None):
         """
-        A dictionary with for each node his clustering coefficient
+        A dictionary with for each node his clustering coefficient : the duration of the triangles containing the node
+        divided by the duration of the pairs of its links present at the same time (0 if there is none).
+
+        Computed with a sweep over links' events : the instantaneous adjacency is maintained and the numbers of pairs
+        of links and of triangles of a node are only updated when one of its links (or a link between two of its
+        neighbors) arrives or departs.
 
+        :param nodes: Compute the clustering coefficient of these nodes only (default: all nodes)
         :return:
         """
-        cc = Counter()
-        N = self.neighborhood()
-        for current_node in N:
-            current_neighbors = N[current_node]
-            l = len(current_neighbors)
-            list_neighbors = list(current_neighbors)
-            sum_link_intersection = sum([min(a1, b1) - max(a0, b0)
-                                         for i1 in range(l)
-                                         for i2 in range(i1 + 1, l)
-                                         for a0, a1 in zip(current_neighbors[list_neighbors[i1]][::2],
-                                                           current_neighbors[list_neighbors[i1]][1::2])
-                                         for b0, b1 in zip(current_neighbors[list_neighbors[i2]][::2],
-                                                           current_neighbors[list_neighbors[i2]][1::2])
-                                         if (b1 >= a0 and a1 >= b0)
-                                         ])
-            sum_triplet_intersection = sum([
-                min(a1, b1, c1) - max(a0, b0, c0)
-                for i1 in range(l)
-                for i2 in range(i1 + 1, l)
-                for a0, a1 in zip(current_neighbors[list_neighbors[i1]][::2],
-                                  current_neighbors[list_neighbors[i1]][1::2])
-                for b0, b1 in zip(current_neighbors[list_neighbors[i2]][::2],
-                                  current_neighbors[list_neighbors[i2]][1::2])
-                if list_neighbors[i2] in N[list_neighbors[i1]]
-                for c0, c1 in zip(N[list_neighbors[i1]][list_neighbors[i2]][::2],
-                                  N[list_neighbors[i1]][list_neighbors[i2]][1::2])
-                if (a1 >= b0 and a1 >= c0 and b1 >= a0 and b1 >= c0 and c1 >= b0 and c1 >= a0)
-            ])
-            # Last index on neighbors can be inverted if u is a neighbor of v,
-            #  v is a neighbor of u
-            if sum_link_intersection != 0:
-                cc[current_node] = sum_triplet_intersection / sum_link_intersection
+        links = storage.to_link_array(self.links)
+        link_presence = storage.to_presence_array(self.link_presence)
+        u, v = self._node_positions(links.u), self._node_positions(links.v)
+        nb_nodes = len(self.nodes)
+        if nodes is None:
+            nodes = self.nodes
+            targets = numpy.ones(nb_nodes, dtype=bool)
+            keep = u != v
+        else:
+            targets = numpy.zeros(nb_nodes, dtype=bool)
+            targets[self._node_positions(nodes)] = True
+            # Only links of the targets and links between their neighbors change their values
+            close = targets.copy()
+            close[u[targets[v]]] = True
+            close[v[targets[u]]] = True
+            keep = (u != v) & (targets[u] | targets[v] | (close[u] & close[v]))
+
+        # Links' segments (instantaneous ones do not count) sorted by time, departures before arrivals
+        owner = link_presence.segment_owner()
+        begins, ends = link_presence.begins, link_presence.ends
+        segments = keep[owner] & (ends > begins)
+        owner, begins, ends = owner[segments], begins[segments], ends[segments]
+        nb_segments = len(owner)
+        times = numpy.concatenate((begins, ends))
+        arrival = numpy.concatenate((numpy.ones(nb_segments, dtype=bool), numpy.zeros(nb_segments, dtype=bool)))
+        order = numpy.lexsort((arrival, times))
+        owner = numpy.tile(owner, 2)[order]
+
+        targets = targets.tolist()
+        adjacency = [set() for _ in range(nb_nodes)]
+        degree, triangles = [0] * nb_nodes, [0] * nb_nodes
+        last = [0.0] * nb_nodes
+        sum_pairs, sum_triangles = [0.0] * nb_nodes, [0.0] * nb_nodes
+
+        def flush(x, t):
+            # Durations of pairs of links and of triangles of x since its last change
+            if targets[x]:
+                dt = t - last[x]
+                sum_pairs[x] += dt * degree[x] * (degree[x] - 1) / 2
+                sum_triangles[x] += dt * triangles[x]
+                last[x] = t
+
+        for t, a, b, is_arrival in zip(times[order].tolist(), u[owner].tolist(), v[owner].tolist(),
+                                       arrival[order].tolist()):
+            if is_arrival:
+                step = 1
             else:
-                cc[current_node] = 0
+                step = -1
+                adjacency[a].discard(b)
+                adjacency[b].discard(a)
+            na, nb = adjacency[a], adjacency[b]
+            common = [w for w in na if w in nb] if len(na) <= len(nb) else [w for w in nb if w in na]
+            for w in common:
+                flush(w, t)
+                triangles[w] += step
+            for x in (a, b):
+                flush(x, t)
+                degree[x] += step
+                triangles[x] += step * len(common)
+            if is_arrival:
+                na.add(b)
+                nb.add(a)
+
+        cc = Counter()
+        for n, x in zip(nodes, self._node_positions(nodes).tolist()):
+            cc[n] = sum_triangles[x] / sum_pairs[x] if sum_pairs[x] != 0 else 0
         return cc
 
     def average_clustering(self, cc=None):
         """
         The average clustering coefficient of a stream graph
 
+        :param cc: Clustering coefficients of nodes (default: computed with ``clustering_coefficient``)
         :return:
         """
         if not cc:
             cc = self.clustering_coefficient()
+        presence = storage.to_presence_array(self.node_presence)
+        durations = numpy.bincount(presence.segment_owner(), weights=presence.durations(), minlength=len(presence))
         T = self.times[1] - self.times[0]
-        cc_bar = sum([coef * sum([tb - ta for ta, tb in zip(i[::2], i[1::2])])
-                      for i, coef in zip(self.node_presence, cc.values())]) / (self.nb_nodes() * T)
+        cc_bar = sum([coef * duration for coef, duration in zip(map(cc.get, self.nodes), durations.tolist())
+                      if coef]) / (self.nb_nodes() * T)
         return cc_bar
 
     def induced_line_stream(self):
         """
-        The induced line stream (which is a stream graph too) corresponding to the stream graph
+        The induced line stream (which is a stream graph too) corresponding to the stream graph : its nodes are the
+        links of the stream graph (by position) and two of them are linked when they share an extremity, during the
+        intersection of their presences (when it is not instantaneous).
+
+        Only links sharing an extremity are compared : segments of the links of each node are sorted by beginning
+        and each segment is paired with the following segments beginning before its end.
 
         :return:
         """
-        node_to_label = {i: l for i, l in enumerate(self.links)}
-        label_to_node = {v: k for k, v in node_to_label.items()}
-        induced_nodes = self.links
-        induced_links = []
-        link_presence = []
-        for n1 in induced_nodes:
-            for n2 in induced_nodes:
-                if n1 == n2:
-                    continue
-                if n1[0] in n2 or n1[1] in n2:
-                    if (n1, n2) in induced_links or (n2, n1) in induced_links:
-                        continue
-                    id1 = self.links.index(n1)
-                    id2 = self.links.index(n2)
-                    intersection_time = []
-                    for t1a, t1b in zip(self.link_presence[id1][::2], self.link_presence[id1][1::2]):
-                        for t2a, t2b in zip(self.link_presence[id2][::2], self.link_presence[id2][1::2]):
-                            if (min(t1b, t2b) - max(t1a, t2a)) > 0:
-                                intersection_time += [max(t1a, t2a)]
-                                intersection_time += [min(t1b, t2b)]
-                    if intersection_time:
-                        # print("n1 :", n1, "n2 :", n2)
-                        induced_links.append((label_to_node[n1], label_to_node[n2]))
-                        link_presence.append(intersection_time)
-                        # print("induced links :", induced_links)
+        links = storage.to_link_array(self.links)
+        link_presence = storage.to_presence_array(self.link_presence)
+        owner = link_presence.segment_owner()
+        # Instantaneous segments have no (non instantaneous) intersection
+        segments = numpy.flatnonzero(link_presence.ends > link_presence.begins)
+        # Incidence index : each segment of a link (u,v) is indexed under u and under v
+        groups = numpy.concatenate((self._node_positions(links.u[owner[segments]]),
+                                    self._node_positions(links.v[owner[segments]])))
+        segments = numpy.tile(segments, 2)
+        begins, ends = link_presence.begins[segments], link_presence.ends[segments]
+        # Times are replaced by their ranks so that (group, time) is an exact integer key
+        times = numpy.unique(numpy.concatenate((begins, ends)))
+        begin_keys = groups * len(times) + numpy.searchsorted(times, begins)
+        end_keys = groups * len(times) + numpy.searchsorted(times, ends)
+        order = numpy.argsort(begin_keys, kind='stable')
+        segments, begin_keys, end_keys = segments[order], begin_keys[order], end_keys[order]
+
+        # Pairs (first, second) of segments of a group, second beginning after first and before its end
+        index = numpy.arange(len(segments))
+        counts = numpy.maximum(numpy.searchsorted(begin_keys, end_keys, side='left') - index - 1, 0)
+        first = numpy.repeat(index, counts)
+        second = numpy.arange(counts.sum()) - numpy.repeat(numpy.cumsum(counts) - counts, counts) + first + 1
+        first, second = segments[first], segments[second]
+        first, second = first[owner[first] != owner[second]], second[owner[first] != owner[second]]
+        # Links sharing both extremities are paired twice
+        pairs = numpy.unique(numpy.minimum(first, second) * link_presence.nb_segments() + numpy.maximum(first, second))
+        first, second = pairs // link_presence.nb_segments(), pairs % link_presence.nb_segments()
+
+        i, j = owner[first], owner[second]
+        begins = numpy.maximum(link_presence.begins[first], link_presence.begins[second])
+        ends = numpy.minimum(link_presence.ends[first], link_presence.ends[second])
+        order = numpy.lexsort((begins, j, i))
+        i, j, begins, ends = i[order], j[order], begins[order], ends[order]
+        starts = numpy.flatnonzero(numpy.concatenate((numpy.ones(min(len(i), 1), dtype=bool),
+                                                      (i[1:] != i[:-1]) | (j[1:] != j[:-1]))))
+        induced_presence = storage.PresenceArray(numpy.append(starts, len(i)), begins, ends)
+
         LS = StreamGraph(times=self.times,
-                         nodes=list(node_to_label.keys()),
+                         nodes=list(range(len(links))),
                          node_presence=self.link_presence,
-                         links=induced_links,
-                         link_presence=link_presence
+                         links=storage.LinkArray(i[starts], j[starts]),
+                         link_presence=induced_presence
                          )
+        if not self.is_columnar():
+            LS.to_lists()
         return LS
 
     def number_of_link_per_node(self, dataframe=False):
@@ -2528,6 +2863,7 @@ class StreamGraph:
             return d
 
     def transform_links_label_to_int(self, index=False):
+        self._materialize()
         dict_node_label_2_int = {}
         dict_int_2_node_label = {}
         for i, n in enumerate(self.nodes):
@@ -2536,6 +2872,7 @@ class StreamGraph:
             self.nodes[i] = i
         for l, j in zip(self.links, range(len(self.links))):
             self.links[j] = (dict_node_label_2_int[l[0]], dict_node_label_2_int[l[1]])
+        self._invalidate(lookups=True)
 
         self.node_to_label = dict_int_2_node_label
         print("NODE LABEL :", self.node_to_label)
@@ -2563,8 +2900,9 @@ class StreamGraph:
         :param nodes_to_remove: a set of nodes
         :return:
         """
+        self._materialize()
         if type(next(iter(nodes_to_remove))) is not int:
-            label_to_node = {v: k for k, v in self.node_to_label.items()}
+            label_to_node = self.get_label_to_node()
             nodes_to_remove = [label_to_node[lab] for lab in nodes_to_remove]
 
         nodes_to_remove = set(nodes_to_remove)
@@ -2579,7 +2917,7 @@ class StreamGraph:
 
         # Adjust nodes label
         if self.node_to_label:
-            new_labels = self.node_to_label.copy()
+            new_labels = {}
             for u in self.nodes:
                 if u not in nodes_to_remove:
                     new_labels[node_to_new_id[u]] = self.node_to_label[u]
@@ -2608,12 +2946,14 @@ class StreamGraph:
         :param l: 
         :return: 
         """
+        self._materialize()
         if type(l[0]) is not int:
-            label_to_node = {v: k for k, v in self.node_to_label.items()}
+            label_to_node = self.get_label_to_node()
             l = (label_to_node[l[0]], label_to_node[l[1]])
 
         del self.link_presence[self.links.index(l)]
         self.links.remove(l)
+        self._invalidate(lookups=True)
 
     def remove_links(self, links_to_remove):
         """
@@ -2622,6 +2962,7 @@ class StreamGraph:
         :param links_to_remove:
         :return:
         """
+        self._materialize()
         links_to_remove = set(links_to_remove)
         id_to_remove = set()
         for id_l, l in enumerate(self.links):
@@ -2660,9 +3001,12 @@ class StreamGraph:
         :param e: ending of the interval (time)
         :return: Maximal segmented node presence corresponding to (b,e,n) : (t0,t1)
         """
-        for t0, t1 in zip(self.node_presence[n][::2], self.node_presence[n][1::2]):
-            if b <= t0 and t1 <= e:
-                return t0, t1
+        node_presence = self.time_index().node_presence
+        o0, o1 = node_presence.offsets[n], node_presence.offsets[n + 1]
+        # Segments are sorted and disjoint : the first segment beginning after b is the only candidate
+        i = o0 + numpy.searchsorted(node_presence.begins[o0:o1], b, side='left')
+        if i < o1 and node_presence.ends[i] <= e:
+            return node_presence.begins[i].item(), node_presence.ends[i].item()
         return None
 
     def get_according_node_presence_from_link(self, l, t0, t1):
@@ -2850,37 +3194,85 @@ class StreamGraph:
 
         return adjacency_list
 
-    def instant_graph(self, t, label=True, to_networkx=False, to_networkit=False):
+    def instant_graph(self, t, label=True, to_networkx=False, to_networkit=False, to_sparse=False):
         """
         Return an adjacency list corresponding to the induced graph
         from the stream graph at a specified time *t*.
 
         :param to_networkit:
         :param to_networkx:
+        :param to_sparse: Return a ``scipy.sparse`` adjacency matrix (rows and columns are nodes' ids)
         :param t: Time instant
         :param label: True if we want the node's label in the adjacency list.
         :return: An adjacency list (networkx compatible)
         """
+        index = self.time_index()
+        return self._graph_from_positions(index.links_at(t), index.nodes_at(t), label=label,
+                                          to_networkx=to_networkx, to_networkit=to_networkit, to_sparse=to_sparse)
+
+    def instant_graphs(self, times, label=True, to_networkx=False, to_sparse=False):
+        """
+        Return the induced graphs at every instant of *times* with a single sweep over the sorted events
+        (instead of one pass over every segment per instant, see ``instant_graph``).
+
+        :param times: An iterable of time instants
+        :param label: True if we want the node's label in the adjacency list.
+        :param to_networkx: Return ``networkx`` graphs
+        :param to_sparse: Return ``scipy.sparse`` adjacency matrices (rows and columns are nodes' ids)
+        :return: A generator of (t, induced graph at t) in increasing order of time
+        """
+        index = self.event_index()
+        codes = index.events['c'].tolist()
+        events_times = index.events['t'].tolist()
+        segments = index.events['seg'].tolist()
+        node_owner = index.node_presence.segment_owner()
+        link_owner = index.link_presence.segment_owner()
+        alive_nodes, alive_links = set(), set()
+        i, nb_events = 0, len(codes)
+        for t in sorted(times):
+            # Presences are closed intervals : apply every event before t and arrivals at t
+            while i < nb_events and (events_times[i] < t or (events_times[i] == t and codes[i] > 0)):
+                c = codes[i]
+                if c == 1:
+                    alive_links.add(segments[i])
+                elif c == -1:
+                    alive_links.discard(segments[i])
+                elif c == 2:
+                    alive_nodes.add(segments[i])
+                else:
+                    alive_nodes.discard(segments[i])
+                i += 1
+            yield t, self._graph_from_positions(link_owner[sorted(alive_links)], node_owner[sorted(alive_nodes)],
+                                                label=label, to_networkx=to_networkx, to_sparse=to_sparse)
+
+    def _graph_from_positions(self, links_pos, nodes_pos, label=True, to_networkx=False, to_networkit=False,
+                              to_sparse=False):
+        # Induced graph given the (sorted) positions of present links and nodes, once per present segment
+        if to_sparse:
+            from scipy import sparse
+            links = self.event_index().links
+            u, v = links.u[links_pos], links.v[links_pos]
+            n = len(self.nodes)
+            A = sparse.coo_matrix((numpy.ones(2 * len(u)), (numpy.concatenate((u, v)), numpy.concatenate((v, u)))),
+                                  shape=(n, n)).tocsr()
+            A.data[:] = 1
+            return A
         adjacency_list = defaultdict(list)
-        for i, l in enumerate(self.links):
-            u = l[0]
-            v = l[1]
-            for t0, t1 in zip(self.link_presence[i][::2], self.link_presence[i][1::2]):
-                if t0 <= t <= t1:
-                    if label:
-                        adjacency_list[self.node_to_label[u]].append(self.node_to_label[v])
-                        adjacency_list[self.node_to_label[v]].append(self.node_to_label[u])
-                    else:
-                        adjacency_list[u].append(v)
-                        adjacency_list[v].append(u)
+        for i in links_pos.tolist():
+            u, v = self.links[i]
+            if label:
+                adjacency_list[self.node_to_label[u]].append(self.node_to_label[v])
+                adjacency_list[self.node_to_label[v]].append(self.node_to_label[u])
+            else:
+                adjacency_list[u].append(v)
+                adjacency_list[v].append(u)
         # Add isolated nodes:
-        for n, np in zip(self.nodes, self.node_presence):
-            for t0, t1 in zip(np[::2], np[1::2]):
-                if t0 <= t <= t1:
-                    if label:
-                        _ = adjacency_list[self.node_to_label[n]]  # Defaultdict functionality
-                    else:
-                        _ = adjacency_list[n]  # Defaultdict functionality
+        for i in nodes_pos.tolist():
+            n = self.nodes[i]
+            if label:
+                _ = adjacency_list[self.node_to_label[n]]  # Defaultdict functionality
+            else:
+                _ = adjacency_list[n]  # Defaultdict functionality
         if to_networkx:
             return nx.from_dict_of_lists(adjacency_list)
         if to_networkit:
@@ -2903,11 +3295,12 @@ class StreamGraph:
 
         # Check if element of nodes_list are labels or nodes id:
         if type(nodes_list[0]) == str:
-            label_to_node = {v: k for k, v in self.node_to_label.items()}
+            label_to_node = self.get_label_to_node()
             nodes_list = [label_to_node[n] for n in nodes_list]
 
+        node_set = self._get_node_set()
         for n in nodes_list:
-            if n not in self.nodes:
+            if n not in node_set:
                 raise ValueError("Trying to filter Stream Graph by nodes that does not exist in Stream Graph")
 
         new_nodes = []
@@ -2918,6 +3311,7 @@ class StreamGraph:
         new_links = []
         new_link_presence = []
 
+        nodes_list = set(nodes_list)
         for n, np in zip(self.nodes, self.node_presence):
             if n in nodes_list:
                 new_n = nodes_to_new_nodes[n]
@@ -2955,8 +3349,9 @@ class StreamGraph:
 
         # Check if element of links_list are labels or nodes id:
         if type(links_list[0][0]) == str:
-            label_to_node = {v: k for k, v in self.node_to_label.items()}
+            label_to_node = self.get_label_to_node()
             links_list = [(label_to_node[l[0]], label_to_node[l[1]]) for l in links_list]
+        links_list = set(tuple(l) for l in links_list)
 
         new_nodes = []
         new_node_presence = []
@@ -3005,6 +3400,7 @@ class StreamGraph:
         :return: A Stream Graph
         """
         a, b = time_window
+        W = self.window(a, b)
         new_nodes = []
         new_node_presence = []
         new_nodes_to_label = {}
@@ -3014,11 +3410,7 @@ class StreamGraph:
         new_links = []
         new_link_presence = []
 
-        for n, np in zip(self.nodes, self.node_presence):
-            new_np = []
-            for t0, t1 in zip(np[::2], np[1::2]):
-                if t0 <= b and a <= t1:  # Intersection
-                    new_np += [max(a, t0), min(b, t1)]
+        for n, new_np in zip(self.nodes, W.node_presence):
             if new_np:
                 new_n = nodes_to_new_nodes[n]
                 if self.node_to_label:
@@ -3028,11 +3420,7 @@ class StreamGraph:
                 new_nodes.append(new_n)
                 new_node_presence.append(new_np)
 
-        for l, lp in zip(self.links, self.link_presence):
-            new_lp = []
-            for t0, t1 in zip(lp[::2], lp[1::2]):
-                if t0 <= b and a <= t1:
-                    new_lp += [max(a, t0), min(b, t1)]
+        for l, new_lp in zip(self.links, W.link_presence):
             if new_lp:
                 u, v = l
                 new_u = nodes_to_new_nodes[u]
@@ -3060,7 +3448,7 @@ class StreamGraph:
         """
 
         if type(cluster[0][2]) == str:
-            label_to_node = {v: k for k, v in self.node_to_label.items()}
+            label_to_node = self.get_label_to_node()
             cluster = [(t0, t1, label_to_node[n]) for t0, t1, n in cluster]
 
         new_nodes = []
@@ -3131,35 +3519,19 @@ class StreamGraph:
     def filter_by_time_window(self, a, b):
         """
         Return the sub stream induced by T = [a,b].
+        Presences are materialized as lists, see ``window`` for a lazy view.
 
         :param a:
         :param b:
         :return:
         """
-        new_node_presence = []
-        new_link_presence = []
-        for n, np in zip(self.nodes, self.node_presence):
-            new_np = []
-            for t0, t1 in zip(np[::2], np[1::2]):
-                if t0 <= b and a <= t1:  # Intersection
-                    new_np += [max(a, t0), min(b, t1)]
-            # if new_np:
-            new_node_presence.append(new_np)
-
-        for l, lp in zip(self.links, self.link_presence):
-            new_lp = []
-            for t0, t1 in zip(lp[::2], lp[1::2]):
-                if t0 <= b and a <= t1:
-                    new_lp += [max(a, t0), min(b, t1)]
-            # if new_lp:
-            new_link_presence.append(new_lp)
-
+        W = self.window(a, b)
         return StreamGraph(times=[a, b], nodes=self.nodes,
                            node_to_label=self.node_to_label,
                            node_to_id=self.node_to_id,
-                           node_presence=new_node_presence,
+                           node_presence=W.node_presence.to_lists(),
                            links=self.links,
-                           link_presence=new_link_presence)
+                           link_presence=W.link_presence.to_lists())
 
     def filter_by_links(self, links_list):
         """
@@ -3954,7 +4326,7 @@ class StreamGraph:
         """
 
         if type(source) is str:
-            label_to_node = {v: k for k, v in self.node_to_label.items()}
+            label_to_node = self.get_label_to_node()
             source = label_to_node[source]
         if source is not None:
             return ap.FoP(self, source, destination, start_time, E=E)
@@ -3978,7 +4350,7 @@ class StreamGraph:
         :return: Times to reach and distances
         """
         if type(source) is str:
-            label_to_node = {v: k for k, v in self.node_to_label.items()}
+            label_to_node = self.get_label_to_node()
             source = label_to_node[source]
 
         if source is not None:
@@ -4002,7 +4374,7 @@ class StreamGraph:
         :return: Latencies
         """
         if type(source) is str:
-            label_to_node = {v: k for k, v in self.node_to_label.items()}
+            label_to_node = self.get_label_to_node()
             source = label_to_node[source]
 
         if source is not None:
@@ -4026,7 +4398,7 @@ class StreamGraph:
         :return: Latencies and lengths
         """
         if type(source) is str:
-            label_to_node = {v: k for k, v in self.node_to_label.items()}
+            label_to_node = self.get_label_to_node()
             source = label_to_node[source]
 
         if source is not None:
@@ -4051,7 +4423,7 @@ class StreamGraph:
         :return: Distances
         """
         if type(source) is str:
-            label_to_node = {v: k for k, v in self.node_to_label.items()}
+            label_to_node = self.get_label_to_node()
             source = label_to_node[source]
 
         if source is not None:
@@ -4075,7 +4447,7 @@ class StreamGraph:
         :return: Distances and durations
         """
         if type(source) is str:
-            label_to_node = {v: k for k, v in self.node_to_label.items()}
+            label_to_node = self.get_label_to_node()
             source = label_to_node[source]
 
         if source is not None:
@@ -4521,7 +4893,7 @@ def write_adjacency_list_to_json(a_l, path_json):
         for v in a_l[u]:
             js['links'].append({'source': u,
                                 'target': v})
-    with open(path_json, 'w') as file_output:
+    with open_file(path_json, 'w') as file_output:
         json.dump(js, file_output)
 
 
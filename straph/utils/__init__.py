@@ -1,11 +1,18 @@
+import bz2
 import cProfile
+import datetime as dt
+import gzip
+import io
+import lzma
 import matplotlib.cm as cmx
 import matplotlib.colors as colors
 import matplotlib.patches as mpatch
 import matplotlib.pyplot as plt
 import matplotlib.ticker as mticker
 import networkx as nx
+import numpy as np
 import os
+import pandas as pd
 import pathlib
 import pstats
 import re
@@ -13,6 +20,108 @@ import subprocess
 import sys
 
 
+# Extensions of compressed files and their compression
+COMPRESSIONS = {'.gz': 'gzip',
+                '.bz2': 'bz2',
+                '.xz': 'xz',
+                '.lzma': 'xz',
+                '.zst': 'zstd'}
+BUFFER_SIZE = 1 << 20
+
+
+def infer_compression(path, compression='infer'):
+    """
+    Compression of a file : *compression* itself unless it is 'infer', in which case it is detected from
+    the extension of *path* (see ``COMPRESSIONS``).
+
+    :param path: Path of the file
+    :param compression: 'infer', None, 'gzip', 'bz2', 'xz' or 'zstd'
+    :return: The compression or None
+    """
+    if compression != 'infer':
+        if compression is not None and compression not in COMPRESSIONS.values():
+            raise ValueError("Unsupported compression : " + str(compression))
+        return compression
+    return COMPRESSIONS.get(os.path.splitext(str(path))[1].lower())
+
+
+def compression_extension(compression):
+    """
+    Extension of files compressed with *compression* ('' if compression is None).
+
+    :param compression: None, 'gzip', 'bz2', 'xz' or 'zstd'
+    :return: An extension
+    """
+    if compression is None:
+        return ''
+    for extension, c in COMPRESSIONS.items():
+        if c == compression:
+            return extension
+    raise ValueError("Unsupported compression : " + str(compression))
+
+
+def open_file(path, mode='r', compression='infer', buffer_size=BUFFER_SIZE, encoding=None, newline=None):
+    """
+    Open a file, possibly compressed (gzip, bz2, xz or zstd), as the builtin ``open`` does.
+    Compressed files are streamed : data is (de)compressed on the fly through buffers of *buffer_size* bytes.
+    zstd requires the package ``zstandard``.
+
+    :param path: Path of the file
+    :param mode: 'r', 'w', 'a' or 'x', followed by 'b' (binary) or 't' (text, default)
+    :param compression: 'infer' (from the extension of *path*), None, 'gzip', 'bz2', 'xz' or 'zstd'
+    :param buffer_size: Size of the buffers (in bytes)
+    :param encoding: Encoding of a text file
+    :param newline: Newline mode of a text file (see ``open``)
+    :return: A file object
+    """
+    compression = infer_compression(path, compression)
+    if compression is None:
+        return open(path, mode, buffering=buffer_size, encoding=encoding, newline=newline)
+    binary_mode = mode.replace('t', '').replace('b', '') + 'b'
+    if compression == 'gzip':
+        # Default level of the gzip tool, much faster to write than the maximum level
+        stream = gzip.open(path, binary_mode, compresslevel=6)
+    elif compression == 'bz2':
+        stream = bz2.open(path, binary_mode)
+    elif compression == 'xz':
+        stream = lzma.open(path, binary_mode)
+    else:
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("Reading or writing zstd files requires the package 'zstandard'.")
+        stream = zstandard.open(path, binary_mode)
+    if binary_mode[0] == 'r':
+        stream = io.BufferedReader(stream, buffer_size)
+    else:
+        stream = io.BufferedWriter(stream, buffer_size)
+    if 'b' in mode:
+        return stream
+    return io.TextIOWrapper(stream, encoding=encoding, newline=newline)
+
+
+def timestamps_to_datetimes(timestamps):
+    """
+    Vectorized version of ``datetime.fromtimestamp`` : timestamps to local datetimes (without timezone),
+    rounded to the microsecond. The local offset is computed once per quarter of hour.
+
+    :param timestamps: A sequence of timestamps
+    :return: A ``pandas.DatetimeIndex``
+    """
+    timestamps = np.asarray(timestamps, dtype=np.float64).reshape(-1)
+    # Same rounding as datetime.fromtimestamp
+    fractions, seconds = np.modf(timestamps)
+    us = np.round(fractions * 10 ** 6).astype(np.int64)
+    seconds = seconds.astype(np.int64) + us // 10 ** 6
+    us %= 10 ** 6
+    quarters, inverse = np.unique(seconds // 900, return_inverse=True)
+    offsets = np.array([(dt.datetime.fromtimestamp(q * 900) -
+                         dt.datetime.fromtimestamp(q * 900, dt.timezone.utc).replace(tzinfo=None)).total_seconds()
+                        for q in quarters.tolist()], dtype=np.int64)
+    us += (seconds + offsets[inverse.reshape(-1)]) * 10 ** 6
+    return pd.DatetimeIndex(us.astype('datetime64[us]'))
+
+
 def get_cmap(N, cmap='nipy_spectral'):
     """Returns a function that maps each index in 0, 1, ... N-1 to a distinct
     RGB color.